@@ -13,22 +13,112 @@ The Depends() function automatically calls these dependencies and injects
 their return values into your endpoint functions.
 """
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Optional, Dict, Tuple, Callable, Awaitable
+from collections import OrderedDict
+from functools import lru_cache
 import jwt
 from datetime import datetime, timedelta
 import logging
+import asyncio
+import random
+import time
 
 from app.core.database import get_db
-from app.core.config import settings
+from app.core.config import get_settings
 from app.models.user import User  # We'll need to create this model
+from app.services.lead_service import LeadService
+from app.services.campaign_services import CampaignService
+from app.services.email_services import get_email_service
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
-# HTTP Bearer token scheme for JWT authentication
-security = HTTPBearer()
+# HTTP Bearer token extraction for JWT authentication
+async def _bearer(request: Request) -> str:
+    """
+    Extract the raw bearer token from the Authorization header.
+    
+    Reads the header directly instead of going through HTTPBearer, so
+    the dependency stays a plain coroutine with no credentials object
+    allocated per request. Error responses match HTTPBearer's.
+    """
+    
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authenticated"
+        )
+    
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid authentication credentials"
+        )
+    
+    return token
+
+# Verified token cache: raw token -> (payload, cache expiry epoch seconds)
+# Repeat requests with the same bearer token skip the HMAC check and JSON
+# decode. Entries never outlive the token's own "exp" claim, and failures
+# are never cached.
+TOKEN_CACHE_MAX_SIZE = 10_000
+TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache: Dict[str, Tuple[dict, float]] = {}
+
+# Decode arguments built once instead of on every jwt.decode call
+_JWT_ALGORITHMS = ("HS256",)
+_JWT_OPTIONS = {"verify_signature": True, "verify_exp": True, "require": ["exp", "sub"]}
+_JWT_SECRET = settings.secret_key.encode()
+
+async def _verify_token(token: str) -> dict:
+    """
+    Decode and validate a JWT, memoizing successful results.
+    
+    Cache hits return immediately. On a miss the HMAC check and JSON
+    decode run in a worker thread so a burst of new tokens (e.g. right
+    after a deploy) doesn't stall the event loop.
+    
+    Args:
+        token: Raw bearer token string
+        
+    Returns:
+        Decoded token payload
+        
+    Raises:
+        jwt.PyJWTError: If the signature is invalid or the token has expired
+    """
+    
+    now = time.time()
+    
+    cached = _token_cache.get(token)
+    if cached is not None:
+        payload, expires_at = cached
+        if now < expires_at:
+            return payload
+        del _token_cache[token]
+    
+    # PyJWT enforces the "exp"/"sub" claims and expiration via _JWT_OPTIONS
+    payload = await asyncio.to_thread(
+        jwt.decode,
+        token,
+        _JWT_SECRET,
+        algorithms=_JWT_ALGORITHMS,
+        options=_JWT_OPTIONS
+    )
+    
+    now = time.time()
+    exp = payload["exp"]
+    
+    # Evict the oldest entry when full (dicts keep insertion order)
+    if len(_token_cache) >= TOKEN_CACHE_MAX_SIZE:
+        _token_cache.pop(next(iter(_token_cache)))
+    _token_cache[token] = (payload, min(exp, now + TOKEN_CACHE_TTL_SECONDS))
+    
+    return payload
 
 class CurrentUser:
     """
@@ -45,8 +135,7 @@ class CurrentUser:
         self.is_active = is_active
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
+    credentials: str = Depends(_bearer)
 ) -> CurrentUser:
     """
     Dependency that extracts and validates the current user from JWT token.
@@ -54,16 +143,17 @@ async def get_current_user(
     This function:
     1. Extracts the JWT token from the Authorization header
     2. Validates the token signature and expiration
-    3. Looks up the user in the database
-    4. Returns a CurrentUser object with company_id for multi-tenancy
+    3. Returns a CurrentUser object with company_id for multi-tenancy
+    
+    No database session is requested here, so routes that only need the
+    caller's identity never check out a pooled connection.
     
     **Multi-tenant Security:**
     The company_id is the key to data isolation. Every database query
     must filter by the current user's company_id.
     
     Args:
-        credentials: JWT token from Authorization header
-        db: Database session
+        credentials: Raw JWT token from Authorization header
         
     Returns:
         CurrentUser object with id, email, and company_id
@@ -93,39 +183,37 @@ async def get_current_user(
     
     return current_user
     try:
-        # Decode JWT token
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.secret_key,
-            algorithms=["HS256"]
-        )
+        # Decode JWT token (cached per raw token string)
+        payload = await _verify_token(credentials)
         
-        # Extract user information from token
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-            
-        # Check token expiration
-        exp = payload.get("exp")
-        if exp is None or datetime.utcnow().timestamp() > exp:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-            
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     except jwt.PyJWTError:
         raise credentials_exception
     
+    # Extract user information from token
+    user_id: int = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception
+    
     # Look up user in database
     # Note: In a real implementation, you'd query your User model here
     # For now, we'll create a mock user for development
     
     # TODO: Replace this with actual database query
-    # Example:
-    # user = await db.get(User, user_id)
-    # if user is None or not user.is_active:
-    #     raise credentials_exception
+    # Keep it in a separate dependency layered on top of this one, so only
+    # routes that need the User row pay for a session. Example:
+    # async def get_current_user_db(
+    #     current_user: CurrentUser = Depends(get_current_user),
+    #     db: AsyncSession = Depends(get_db)
+    # ) -> User:
+    #     user = await db.get(User, current_user.id)
+    #     if user is None or not user.is_active:
+    #         raise credentials_exception
     
     # Mock user for development (REMOVE THIS IN PRODUCTION!)
     current_user = CurrentUser(
@@ -157,7 +245,12 @@ def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     
     # Set token expiration
-    expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+    # Jitter by up to a minute so tokens issued together don't all expire
+    # (and miss the verification cache) at the same moment
+    expire = datetime.utcnow() + timedelta(
+        minutes=settings.access_token_expire_minutes,
+        seconds=random.randint(-60, 60)
+    )
     to_encode.update({"exp": expire})
     
     # Encode the token
@@ -169,55 +262,83 @@ def create_access_token(data: dict) -> str:
     
     return encoded_jwt
 
-async def get_current_active_user(
-    current_user: CurrentUser = Depends(get_current_user)
-) -> CurrentUser:
-    """
-    Dependency that ensures the current user is active.
-    
-    Use this instead of get_current_user when you want to ensure
-    the user account is active and not disabled.
+@lru_cache(maxsize=None)
+def require_user(*, active: bool = True, admin: bool = False) -> Callable[..., Awaitable[CurrentUser]]:
     """
+    Build a single dependency that performs all user checks inline.
     
-    if not current_user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
-        )
-    
-    return current_user
-
-# Optional: Admin-only dependency
-async def get_admin_user(
-    current_user: CurrentUser = Depends(get_current_active_user)
-) -> CurrentUser:
-    """
-    Dependency that ensures the current user has admin privileges.
+    Each (active, admin) combination returns the same callable object, so
+    FastAPI resolves it once per request instead of walking a chain of
+    one-check dependencies.
     
     Example usage:
     @router.delete("/companies/{company_id}")
-    async def delete_company(admin: CurrentUser = Depends(get_admin_user)):
+    async def delete_company(admin: CurrentUser = Depends(require_user(admin=True))):
         # Only admins can access this endpoint
     """
     
-    # TODO: Add admin role checking
-    # In a real app, you'd check user.role == "admin" or similar
+    async def dependency(
+        current_user: CurrentUser = Depends(get_current_user)
+    ) -> CurrentUser:
+        if (active or admin) and not current_user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Inactive user"
+            )
+        
+        # TODO: Add admin role checking when admin is set
+        # In a real app, you'd check user.role == "admin" or similar
+        
+        return current_user
     
-    return current_user
+    return dependency
+
+# Shortcuts for the common modes
+# Use get_current_active_user when the account must not be disabled,
+# and get_admin_user for admin-only endpoints.
+get_current_active_user = require_user()
+get_admin_user = require_user(admin=True)
+
+# Service dependencies
+# Routes depend on these instead of constructing services inline, so the
+# shared EmailService (and its OpenAI client) is reused across requests.
+async def get_lead_service(db: AsyncSession = Depends(get_db)) -> LeadService:
+    """Provide a LeadService bound to the request's database session."""
+    return LeadService(db)
+
+async def get_campaign_service(db: AsyncSession = Depends(get_db)) -> CampaignService:
+    """Provide a CampaignService bound to the request's database session."""
+    return CampaignService(db, email_service=get_email_service())
 
 # Rate limiting dependency (basic version)
 class RateLimiter:
     """
-    Simple in-memory rate limiter.
+    Simple in-memory fixed-window rate limiter.
     
-    For production, you'd use Redis or a proper rate limiting service.
-    This is just for demonstration.
+    Each user gets one (count, window) counter, so a check is O(1)
+    regardless of max_requests. The table is kept in least-recently-used
+    order and capped at max_users, so memory stays bounded no matter how
+    many distinct users hit the API. For production, you'd use Redis
+    INCR + EXPIRE on a per-window key to share counts across workers.
     """
     
-    def __init__(self, max_requests: int = 100, window_minutes: int = 1):
+    def __init__(self, max_requests: int = 100, window_minutes: int = 1, max_users: int = 16384):
         self.max_requests = max_requests
         self.window_minutes = window_minutes
-        self.requests = {}  # In production, use Redis
+        self.window_seconds = window_minutes * 60
+        self.max_users = max_users
+        self.requests: OrderedDict[int, Tuple[int, int]] = OrderedDict()  # user_id -> (count, window)
+        self._last_sweep_window = 0
+    
+    def _sweep(self, window: int) -> None:
+        """Drop counters from past windows, oldest-touched first."""
+        
+        while self.requests:
+            user_id, (_, user_window) = next(iter(self.requests.items()))
+            if user_window >= window:
+                break
+            del self.requests[user_id]
+        self._last_sweep_window = window
     
     async def __call__(
         self,
@@ -225,23 +346,33 @@ class RateLimiter:
     ) -> CurrentUser:
         """Check rate limit for current user."""
         
-        now = datetime.utcnow()
-        window_start = now - timedelta(minutes=self.window_minutes)
+        # Monotonic float clock: no datetime allocation per request, and
+        # immune to wall-clock jumps
+        window = int(time.monotonic() // self.window_seconds)
+        
+        # Once per window, discard users whose counters have expired
+        if window != self._last_sweep_window:
+            self._sweep(window)
         
-        # Clean old requests
-        user_requests = self.requests.get(current_user.id, [])
-        user_requests = [req_time for req_time in user_requests if req_time > window_start]
+        # Reset the counter when a new window starts
+        count, user_window = self.requests.get(current_user.id, (0, window))
+        if user_window != window:
+            count = 0
         
         # Check limit
-        if len(user_requests) >= self.max_requests:
+        if count >= self.max_requests:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail=f"Rate limit exceeded: {self.max_requests} requests per {self.window_minutes} minutes"
             )
         
-        # Add current request
-        user_requests.append(now)
-        self.requests[current_user.id] = user_requests
+        # Count current request and mark the user most recently used
+        self.requests[current_user.id] = (count + 1, window)
+        self.requests.move_to_end(current_user.id)
+        
+        # Evict the least recently seen user when over capacity
+        if len(self.requests) > self.max_users:
+            self.requests.popitem(last=False)
         
         return current_user
 
@@ -5,11 +5,13 @@ Campaign API endpoints.
 This module provides REST API endpoints for managing email campaigns.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, Query
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_current_user, get_campaign_service
+from app.core.cache import weak_etag, etag_matches
 from app.models.user import User
 from app.models.company import Company
 from app.services.campaign_services import CampaignService
@@ -23,6 +25,23 @@ from app.schemas.campaign import (
 
 router = APIRouter(prefix="/campaigns", tags=["Campaigns"])
 
+# Shared "no filters" instance for the common unfiltered list request
+# (filters are only read by the service, never mutated)
+_EMPTY_CAMPAIGN_FILTER = CampaignFilter()
+
+# Pre-serialized 404 body. Returning it directly skips raising an
+# HTTPException, re-raising it past our except blocks, and having the
+# exception handler serialize the same detail again.
+_NOT_FOUND_BODY = b'{"detail":"Campaign not found"}'
+
+def _campaign_not_found() -> Response:
+    """Build the 404 response for a missing (or other company's) campaign."""
+    return Response(
+        content=_NOT_FOUND_BODY,
+        status_code=status.HTTP_404_NOT_FOUND,
+        media_type="application/json"
+    )
+
 @router.get("/test", tags=["Campaigns"])
 async def test_campaign_endpoint():
     """
@@ -33,18 +52,23 @@ async def test_campaign_endpoint():
 @router.post("/", response_model=CampaignResponse)
 async def create_campaign(
     campaign_data: CampaignCreate,
-    db: AsyncSession = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    campaign_service: CampaignService = Depends(get_campaign_service),
     current_user: User = Depends(get_current_user)
 ):
     """
     Create a new email campaign.
+    
+    Returns as soon as the campaign and its PENDING emails are stored;
+    the emails are generated in the background. Poll GET /campaigns/{id}
+    to follow progress.
     """
     try:
-        campaign_service = CampaignService(db)
         campaign = await campaign_service.create_campaign(
             campaign_data=campaign_data,
             company_id=current_user.company_id,
-            user_id=current_user.id
+            user_id=current_user.id,
+            background_tasks=background_tasks
         )
         return campaign
     except ValueError as e:
@@ -65,38 +89,34 @@ async def list_campaigns(
     search: Optional[str] = Query(None, description="Search campaign names"),
     status: Optional[str] = Query(None, description="Filter by status"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
-    db: AsyncSession = Depends(get_db),
+    with_total: bool = Query(True, description="Include total/total_pages (skips the COUNT query when false)"),
+    after_id: Optional[int] = Query(None, ge=0, description="Keyset cursor: return the campaigns after this one (pass next_cursor; 0 for the first page)"),
+    campaign_service: CampaignService = Depends(get_campaign_service),
     current_user: User = Depends(get_current_user)
 ):
     """
     List campaigns for the current user's company.
     """
     try:
-        campaign_service = CampaignService(db)
-        
-        # Build filter object
-        filters = CampaignFilter(
-            search=search,
-            status=status,
-            is_active=is_active
-        )
-        
-        campaigns, total = await campaign_service.list_campaigns(
+        # Build filter object (or reuse the shared empty one)
+        if search is None and status is None and is_active is None:
+            filters = _EMPTY_CAMPAIGN_FILTER
+        else:
+            filters = CampaignFilter(
+                search=search,
+                status=status,
+                is_active=is_active
+            )
+
+        body = await campaign_service.list_campaigns_body(
             company_id=current_user.company_id,
             page=page,
             page_size=page_size,
-            filters=filters
+            filters=filters,
+            with_total=with_total,
+            after_id=after_id
         )
-        
-        total_pages = (total + page_size - 1) // page_size
-        
-        return {
-            "campaigns": campaigns,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": total_pages
-        }
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,26 +126,34 @@ async def list_campaigns(
 @router.get("/{campaign_id}", response_model=CampaignResponse)
 async def get_campaign(
     campaign_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    campaign_service: CampaignService = Depends(get_campaign_service),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a specific campaign by ID.
+    
+    Supports If-None-Match: returns 304 Not Modified when the client's
+    ETag is still current.
     """
     try:
-        campaign_service = CampaignService(db)
-        campaign = await campaign_service.get_campaign(
+        campaign = await campaign_service.get_campaign_response(
             campaign_id=campaign_id,
             company_id=current_user.company_id
         )
         
         if not campaign:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Campaign not found"
-            )
+            return _campaign_not_found()
         
-        return campaign
+        # Conditional GET: skip sending a body the client already has.
+        # The tag hashes the serialized body itself, so it changes with
+        # anything the body shows, not only with the row's updated_at
+        body = campaign.model_dump_json().encode()
+        etag = weak_etag(body)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
     except HTTPException:
         raise
     except Exception as e:
@@ -138,14 +166,13 @@ async def get_campaign(
 async def update_campaign(
     campaign_id: int,
     campaign_data: CampaignUpdate,
-    db: AsyncSession = Depends(get_db),
+    campaign_service: CampaignService = Depends(get_campaign_service),
     current_user: User = Depends(get_current_user)
 ):
     """
     Update a campaign.
     """
     try:
-        campaign_service = CampaignService(db)
         campaign = await campaign_service.update_campaign(
             campaign_id=campaign_id,
             company_id=current_user.company_id,
@@ -153,10 +180,7 @@ async def update_campaign(
         )
         
         if not campaign:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Campaign not found"
-            )
+            return _campaign_not_found()
         
         return campaign
     except HTTPException:
@@ -175,24 +199,20 @@ async def update_campaign(
 @router.delete("/{campaign_id}")
 async def delete_campaign(
     campaign_id: int,
-    db: AsyncSession = Depends(get_db),
+    campaign_service: CampaignService = Depends(get_campaign_service),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a campaign.
     """
     try:
-        campaign_service = CampaignService(db)
         success = await campaign_service.delete_campaign(
             campaign_id=campaign_id,
             company_id=current_user.company_id
         )
         
         if not success:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Campaign not found"
-            )
+            return _campaign_not_found()
         
         return {"message": "Campaign deleted successfully"}
     except HTTPException:
@@ -13,14 +13,17 @@ Key concepts:
 - Documentation: FastAPI auto-generates API docs
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
 from typing import Optional, List
 import logging
 
-from app.core.database import get_db
+from app.core.config import get_settings
+from app.core.cache import weak_etag, etag_matches
+from app.core.database import release_connection
 from app.services.lead_service import LeadService
-from app.services.email_services import EmailService
+from app.services.email_services import get_email_service
 from app.schemas.lead import (
     LeadCreate, 
     LeadUpdate, 
@@ -31,13 +34,20 @@ from app.schemas.lead import (
     LeadBulkResponse
 )
 # We'll create this dependency nextyou
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_lead_service
 
 logger = logging.getLogger(__name__)
 
+# Validates a whole page of ORM leads in a single pydantic-core call
+_LEAD_LIST_ADAPTER = TypeAdapter(List[LeadResponse])
+
 # Create router with prefix and tags for organization
 router = APIRouter(prefix="/leads", tags=["leads"])
 
+# Shared "no filters" instance for the common unfiltered list request
+# (filters are only read by the service, never mutated)
+_EMPTY_LEAD_FILTER = LeadFilter()
+
 @router.get("/debug", tags=["leads"])
 async def debug_leads_endpoint():
     """
@@ -48,7 +58,7 @@ async def debug_leads_endpoint():
 @router.post("/", response_model=LeadResponse, status_code=status.HTTP_201_CREATED)
 async def create_lead(
     lead_data: LeadCreate,
-    db: AsyncSession = Depends(get_db),
+    lead_service: LeadService = Depends(get_lead_service),
     current_user = Depends(get_current_user)
 ):
     """
@@ -78,9 +88,6 @@ async def create_lead(
     """
     
     try:
-        # Create lead service instance
-        lead_service = LeadService(db)
-        
         # Create the lead (service handles all business logic)
         lead = await lead_service.create_lead(
             lead_data=lead_data,
@@ -100,11 +107,11 @@ async def create_lead(
             detail=str(e)
         )
     except Exception as e:
-        # Unexpected errors
-        logger.error(f"Unexpected error creating lead: {e}")
-        logger.error(f"Error type: {type(e)}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        # Unexpected errors (full traceback only in debug; logging formats it lazily)
+        if get_settings().debug:
+            logger.exception("Unexpected error creating lead")
+        else:
+            logger.error("Unexpected error creating lead: %r", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred"
@@ -121,9 +128,11 @@ async def list_leads(
     search: Optional[str] = Query(None, description="Search across name, email, company"),
     min_score: Optional[int] = Query(None, ge=0, le=100, description="Minimum lead score"),
     max_score: Optional[int] = Query(None, ge=0, le=100, description="Maximum lead score"),
+    with_total: bool = Query(True, description="Include total/total_pages (skips the COUNT query when false)"),
+    after_id: Optional[int] = Query(None, ge=0, description="Keyset cursor: return leads with id greater than this"),
     
     # Dependencies
-    db: AsyncSession = Depends(get_db),
+    lead_service: LeadService = Depends(get_lead_service),
     current_user = Depends(get_current_user)
 ):
     """
@@ -136,6 +145,9 @@ async def list_leads(
     - `source`: Filter by lead source
     - `search`: Search across name, email, and company
     - `min_score`/`max_score`: Filter by lead score range
+    - `with_total`: Set to false to skip counting; `total`/`total_pages` are then null
+    - `after_id`: Keyset pagination - pass 0 for the first page, then the
+      returned `next_cursor`. Leads are ordered by id and `page` is ignored.
     
     **Example Response:**
     ```json
@@ -153,45 +165,58 @@ async def list_leads(
         "total": 150,
         "page": 1,
         "page_size": 50,
-        "total_pages": 3
+        "total_pages": 3,
+        "next_cursor": null
     }
     ```
     """
     
     try:
         # Build filters from query parameters
-        filters = LeadFilter(
-            status=status,
-            source=source,
-            company_name=company_name,
-            search=search,
-            min_score=min_score,
-            max_score=max_score
-        )
+        # Skip building a model when no filter was given
+        if status is None and source is None and company_name is None \
+                and search is None and min_score is None and max_score is None:
+            filters = _EMPTY_LEAD_FILTER
+        else:
+            filters = LeadFilter(
+                status=status,
+                source=source,
+                company_name=company_name,
+                search=search,
+                min_score=min_score,
+                max_score=max_score
+            )
         
         # Get leads from service
-        lead_service = LeadService(db)
-        leads, total = await lead_service.list_leads(
+        leads, total, next_cursor = await lead_service.list_leads(
             company_id=current_user.company_id,
             filters=filters,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            with_total=with_total,
+            after_id=after_id
         )
         
         # Get aggregate statistics
         stats = await lead_service.get_lead_stats(company_id=current_user.company_id)
         
         # Calculate pagination info
-        total_pages = (total + page_size - 1) // page_size  # Ceiling division
+        total_pages = -(-total // page_size) if total is not None else None  # Ceiling division
         
-        return LeadListResponse(
-            leads=leads,
+        # The data was produced by us, so skip re-validating the envelope;
+        # only the ORM -> LeadResponse conversion of the rows is needed
+        # (one TypeAdapter call for the whole page). Serializing to bytes
+        # here skips FastAPI's dump -> re-validate -> encode of the result.
+        body = LeadListResponse.model_construct(
+            leads=_LEAD_LIST_ADAPTER.validate_python(leads, from_attributes=True),
             total=total,
             page=page,
             page_size=page_size,
             total_pages=total_pages,
+            next_cursor=next_cursor,
             stats=stats
-        )
+        ).model_dump_json()
+        return Response(content=body, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error listing leads: {e}")
@@ -203,17 +228,20 @@ async def list_leads(
 @router.get("/{lead_id}", response_model=LeadResponse)
 async def get_lead(
     lead_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    lead_service: LeadService = Depends(get_lead_service),
     current_user = Depends(get_current_user)
 ):
     """
     Get a specific lead by ID.
     
     Returns 404 if the lead doesn't exist or doesn't belong to the user's company.
+    
+    The response carries an ETag; send it back in If-None-Match to get an
+    empty 304 Not Modified while the lead hasn't changed.
     """
     
-    lead_service = LeadService(db)
-    lead = await lead_service.get_lead(
+    lead = await lead_service.get_lead_response(
         lead_id=lead_id,
         company_id=current_user.company_id
     )
@@ -224,13 +252,21 @@ async def get_lead(
             detail=f"Lead with ID {lead_id} not found"
         )
     
-    return lead
+    # Conditional GET: skip sending a body the client already has.
+    # The tag hashes the serialized body itself, so it changes with
+    # anything the body shows, not only with the row's updated_at
+    body = lead.model_dump_json().encode()
+    etag = weak_etag(body)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @router.put("/{lead_id}", response_model=LeadResponse)
 async def update_lead(
     lead_id: int,
     lead_data: LeadUpdate,
-    db: AsyncSession = Depends(get_db),
+    lead_service: LeadService = Depends(get_lead_service),
     current_user = Depends(get_current_user)
 ):
     """
@@ -240,7 +276,6 @@ async def update_lead(
     """
     
     try:
-        lead_service = LeadService(db)
         lead = await lead_service.update_lead(
             lead_id=lead_id,
             company_id=current_user.company_id,
@@ -271,7 +306,7 @@ async def update_lead(
 @router.delete("/{lead_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_lead(
     lead_id: int,
-    db: AsyncSession = Depends(get_db),
+    lead_service: LeadService = Depends(get_lead_service),
     current_user = Depends(get_current_user)
 ):
     """
@@ -281,7 +316,6 @@ async def delete_lead(
     Returns 204 No Content on success, 404 if lead not found.
     """
     
-    lead_service = LeadService(db)
     deleted = await lead_service.delete_lead(
         lead_id=lead_id,
         company_id=current_user.company_id
@@ -299,7 +333,7 @@ async def delete_lead(
 @router.post("/bulk", response_model=LeadBulkResponse)
 async def create_leads_bulk(
     bulk_data: LeadBulkCreate,
-    db: AsyncSession = Depends(get_db),
+    lead_service: LeadService = Depends(get_lead_service),
     current_user = Depends(get_current_user)
 ):
     """
@@ -315,26 +349,11 @@ async def create_leads_bulk(
     - Duplicate emails within the batch will be rejected
     """
     
-    lead_service = LeadService(db)
-    created_leads = []
-    errors = []
-    
-    # Process each lead
-    for i, lead_data in enumerate(bulk_data.leads):
-        try:
-            lead = await lead_service.create_lead(
-                lead_data=lead_data,
-                company_id=current_user.company_id,
-                created_by=current_user.id
-            )
-            created_leads.append(lead)
-            
-        except Exception as e:
-            errors.append({
-                "index": i,
-                "email": lead_data.email,
-                "error": str(e)
-            })
+    created_leads, errors = await lead_service.create_leads_bulk(
+        leads_data=bulk_data.leads,
+        company_id=current_user.company_id,
+        created_by=current_user.id
+    )
     
     logger.info(
         f"Bulk lead creation: {len(created_leads)} created, "
@@ -349,14 +368,13 @@ async def create_leads_bulk(
 @router.post("/{lead_id}/generate-email", response_model=dict)
 async def generate_email(
     lead_id: int,
-    db: AsyncSession = Depends(get_db),
+    lead_service: LeadService = Depends(get_lead_service),
     current_user = Depends(get_current_user)
 ):
     """
     Generate an email for a lead.
     """
     try:
-        lead_service = LeadService(db)
         lead = await lead_service.get_lead(lead_id=lead_id, company_id=current_user.company_id)
 
         if not lead:
@@ -365,7 +383,10 @@ async def generate_email(
                 detail=f"Lead with ID {lead_id} not found"
             )
         
-        email_service = EmailService()
+        # Done with the database; don't hold a pooled connection during the OpenAI call
+        await release_connection(lead_service.db)
+        
+        email_service = get_email_service()
         email_data = await email_service.generate_email(lead)
 
         return email_data
@@ -0,0 +1,98 @@
+# backend/app/core/cache.py
+"""
+Small in-process caches.
+
+These are per-worker caches for hot, read-mostly data. They bound both
+memory (maxsize, least-recently-used eviction) and staleness (ttl), so
+they're safe to use without a shared invalidation channel as long as a
+short window of stale reads is acceptable.
+
+For cross-worker caching you'd use Redis instead.
+"""
+
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+import hashlib
+import time
+
+V = TypeVar("V")
+
+class TTLCache(Generic[V]):
+    """
+    Bounded LRU cache whose entries expire after ttl seconds.
+
+    Example usage:
+        cache = TTLCache(maxsize=4096, ttl=10)
+        cache.set((company_id, lead_id), response)
+        hit = cache.get((company_id, lead_id))
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[V, float]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """Return the cached value, or default if missing or expired."""
+
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        value, expires_at = item
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key (e.g. after the underlying row changed)."""
+
+        item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# HTTP conditional GET helpers
+# Polling clients send back the ETag they last saw in If-None-Match; when
+# it still matches we answer 304 with no body.
+
+def weak_etag(body: bytes) -> str:
+    """
+    Build a weak ETag from the serialized response body.
+    
+    Hashing what is actually served (rather than a row's id and
+    updated_at) means anything that changes the body changes the tag:
+    counts computed from other tables, research kept in a side table,
+    and so on.
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (possibly a comma-separated list) against an ETag."""
+    
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    # Weak comparison: ignore the W/ prefix on either side
+    target = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == target
+        for candidate in if_none_match.split(",")
+    )
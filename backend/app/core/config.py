@@ -6,10 +6,10 @@ This file handles all environment variables and app settings.
 We use Pydantic's BaseSettings for type safety and validation.
 """
 
-from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, computed_field
 from typing import Optional
-import os
+from functools import cached_property, lru_cache
 
 class Settings(BaseSettings):
     """
@@ -34,6 +34,41 @@ class Settings(BaseSettings):
         description="PostgreSQL database connection string"
     )
     
+    # Connection Pool
+    # Sized for ~1000 DAU on a single API instance. Lower these if many
+    # workers share one Postgres (pool_size + max_overflow per worker).
+    db_pool_size: int = Field(default=20, description="Connections kept open per worker")
+    db_max_overflow: int = Field(default=10, description="Extra connections allowed under burst load")
+    db_pool_recycle_seconds: int = Field(
+        default=1500,
+        description="Reopen connections older than this (stay under server/proxy idle timeouts)"
+    )
+    db_pool_pre_ping: bool = Field(
+        default=False,
+        description="Ping each connection on checkout (one extra round trip; only for flaky networks)"
+    )
+    db_pool_timeout_seconds: int = Field(
+        default=10,
+        description="How long a request waits for a free connection before erroring"
+    )
+    db_use_null_pool: bool = Field(
+        default=False,
+        description="Open a fresh connection per session (serverless / external pooler like PgBouncer)"
+    )
+    db_pgbouncer: bool = Field(
+        default=False,
+        description="Connections go through PgBouncer in transaction mode (turns off asyncpg's prepared statement caches)"
+    )
+    
+    # Schema Management
+    # Creating tables at startup makes every worker introspect the schema
+    # on boot. Leave this off in production and run setup_database.py
+    # (or migrations) once per deploy instead.
+    auto_create_schema: bool = Field(
+        default=False,
+        description="Run create_all on app startup (local dev convenience)"
+    )
+    
     # Security Settings
     secret_key: str = Field(
         default="your-super-secret-key-change-this-in-production",
@@ -55,6 +90,42 @@ class Settings(BaseSettings):
         description="Emails per hour per company (prevents spam)"
     )
     
+    # CORS Settings (for your React frontend)
+    allowed_origins: list[str] = Field(
+        default=["http://localhost:3000"],
+        description="Allowed origins for CORS (add your frontend URL)"
+    )
+
+    @computed_field
+    @cached_property
+    def database_host(self) -> str:
+        """
+        database_url without credentials, safe to log or display.
+        
+        Computed once per Settings instance. Splits on the last "@" so
+        passwords containing "@" don't leak into the result.
+        """
+        return self.database_url.rsplit("@", 1)[-1]
+
+    model_config = SettingsConfigDict(
+        # Load from .env file
+        env_file=".env",
+        case_sensitive=False,
+        # .env also holds the integration settings below; skip them here
+        extra="ignore",
+        # Settings are read-only after startup; change them via env vars
+        frozen=True,
+    )
+
+class IntegrationSettings(BaseSettings):
+    """
+    Settings for external services (OpenAI, MCP servers, Redis).
+    
+    Kept separate from Settings so the app can start and serve requests
+    like /health without loading them. They're only read when a
+    service that talks to one of these integrations is first created.
+    """
+    
     # MCP Configuration
     mcp_timeout_seconds: int = Field(
         default=30,
@@ -81,28 +152,74 @@ class Settings(BaseSettings):
         description="Redis connection for caching and rate limiting"
     )
     
-    # CORS Settings (for your React frontend)
-    allowed_origins: list[str] = Field(
-        default=["http://localhost:3000"],
-        description="Allowed origins for CORS (add your frontend URL)"
-    )
-    
     #OPENAI Configuration
     openai_api_key: str = Field(
         default="",
         description="OpenAI API Key for Email Generation"
     )
+    openai_max_concurrency: int = Field(
+        default=10,
+        ge=1,
+        description="Maximum OpenAI requests in flight at once per campaign (stay under provider rate limits)"
+    )
+    openai_max_retries: int = Field(
+        default=5,
+        ge=0,
+        description="Retries for rate-limited (429), server-error and timed-out OpenAI requests, with exponential backoff"
+    )
+    openai_batch_threshold: int = Field(
+        default=500,
+        ge=1,
+        description="Campaigns with more pending emails than this are generated through the OpenAI Batch API"
+    )
+    openai_batch_poll_seconds: int = Field(
+        default=60,
+        ge=1,
+        description="How often the background poller checks submitted OpenAI batch jobs"
+    )
+    openai_batch_enabled: bool = Field(
+        default=True,
+        description="Use the OpenAI Batch API for large campaigns (and run the poller that collects its results)"
+    )
+    
+    @property
+    def batch_generation_enabled(self) -> bool:
+        """Batch API generation is on and can actually reach OpenAI."""
+        return self.openai_batch_enabled and bool(self.openai_api_key)
 
-    class Config:
-        # Load from .env file
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        # .env also holds the core settings above; skip them here
+        extra="ignore",
+        frozen=True,
+    )
 
-# Create global settings instance
-# This pattern allows easy testing and configuration switching
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the application settings, loading them on first use.
+    
+    Settings are read from the environment and .env only when something
+    first asks for them, not as a side effect of importing this module.
+    The result is cached, so every caller shares one instance.
+    
+    In tests, call get_settings.cache_clear() after changing environment
+    variables to load a fresh config.
+    
+    Example usage:
+        settings = get_settings()
+        if settings.debug:
+            ...
+    """
+    return Settings()
 
-# Export commonly used values for convenience
-DATABASE_URL = settings.database_url
-SECRET_KEY = settings.secret_key
-DEBUG = settings.debug
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_integration_settings() -> IntegrationSettings:
+    """
+    Return the external service settings, loading them on first use.
+    
+    Same caching behavior as get_settings(); clear with
+    get_integration_settings.cache_clear() in tests.
+    """
+    return IntegrationSettings()
@@ -14,21 +14,99 @@ Key concepts:
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import MetaData
-from typing import AsyncGenerator
+from sqlalchemy import JSON, MetaData
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.pool import NullPool
+from typing import Any, AsyncGenerator, Dict, Optional
+from datetime import datetime, timezone
 import logging
+import orjson
 
-from .config import settings
+from .config import get_settings
 
 # Set up logging to help with debugging
 logger = logging.getLogger(__name__)
 
 # Why async? With 1000 DAU, you'll have multiple concurrent requests.
 # Async allows the server to handle other requests while waiting for database I/O.
+settings = get_settings()
+
+def _engine_options() -> Dict[str, Any]:
+    """
+    Build the connection pool options for create_async_engine.
+    
+    - Long-lived workers keep a sized pool so requests reuse open
+      connections instead of paying connect + auth on every query.
+    - Serverless workers (db_use_null_pool) skip pooling entirely, since
+      a pool would outlive the process and hold idle connections.
+    - SQLite (local dev) keeps SQLAlchemy's default, which takes no
+      sizing options.
+    - Behind PgBouncer (db_pgbouncer), asyncpg's statement caching is
+      turned off.
+    """
+    
+    if settings.database_url.startswith("sqlite") and not settings.db_use_null_pool:
+        return {}
+    
+    options: Dict[str, Any]
+    if settings.db_use_null_pool:
+        options = {"poolclass": NullPool}
+    else:
+        options = {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_recycle": settings.db_pool_recycle_seconds,
+            "pool_timeout": settings.db_pool_timeout_seconds,
+        }
+    
+    # Our queries are short OLTP lookups; Postgres JIT compilation only
+    # adds planning time to them. TCP keepalives keep idle pooled
+    # connections from being silently dropped by NATs/load balancers, so we
+    # don't need to ping every connection on checkout.
+    if settings.database_url.startswith("postgresql+asyncpg"):
+        server_settings = {"application_name": "sales_saas"}
+        connect_args: Dict[str, Any] = {
+            "server_settings": server_settings,
+            "timeout": 10,  # Seconds to establish a new connection
+        }
+        
+        if settings.db_pgbouncer:
+            # In transaction mode consecutive statements can run on
+            # different server connections, so statements prepared on one
+            # aren't there on the next: turn off both asyncpg's and
+            # SQLAlchemy's prepared statement caches. PgBouncer also
+            # rejects startup parameters it doesn't know, so only
+            # application_name is sent.
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+        else:
+            server_settings["jit"] = "off"
+            server_settings["tcp_keepalives_idle"] = "60"
+        
+        options["connect_args"] = connect_args
+    
+    return options
+
+def _json_dumps(value: Any) -> str:
+    """
+    Serialize JSON/JSONB column values with orjson instead of json.dumps.
+    
+    orjson is several times faster on the small dicts we store
+    (context_json, delays_json, custom_fields). Returned as str because
+    the drivers bind JSON columns as text. OPT_NON_STR_KEYS turns int
+    keys into strings, like json.dumps does.
+    """
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,  # Log all SQL queries in debug mode
-    pool_pre_ping=True,   # Verify connections before use (prevents stale connections)
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads,
+    # Stale connections are handled by pool_recycle + keepalives instead of
+    # a SELECT 1 round trip on every checkout
+    pool_pre_ping=settings.db_pool_pre_ping,
+    **_engine_options()
 )
 
 # Session factory - creates new database sessions
@@ -54,6 +132,22 @@ metadata = MetaData(
 
 Base = declarative_base(metadata=metadata)
 
+# JSON column type for models: JSONB on PostgreSQL (stored pre-parsed in a
+# binary form, so reads don't re-parse text and it can be GIN indexed),
+# plain JSON on other databases like the local SQLite dev DB
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+def utcnow() -> datetime:
+    """
+    Current UTC time, used as the client-side default for audit timestamps.
+    
+    Filling created_at/updated_at in Python means SQLAlchemy already knows
+    the values after an INSERT/UPDATE, so it doesn't have to fetch them back
+    (RETURNING or a refresh). The server_default stays as a fallback for
+    rows written outside the ORM.
+    """
+    return datetime.now(timezone.utc)
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency function that provides database sessions to API endpoints.
@@ -63,22 +157,38 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     2. Ensures the session is properly closed after use
     3. Handles transaction rollback on errors
     
+    It does not commit. Services commit their own writes, so read-only
+    requests don't pay for a COMMIT they don't need.
+    
+    The session only checks out a pooled connection when it runs its first
+    statement, and FastAPI shares one session between all dependencies of
+    a request, so routes that never query don't hold a connection.
+    
     Usage in API endpoints:
     async def create_lead(db: AsyncSession = Depends(get_db)):
         # Use db session here
     """
+    # The context manager closes the session (and returns its connection)
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()  # Commit transaction if no errors
         except Exception as e:
             await session.rollback()  # Rollback on errors
             logger.error(f"Database transaction failed: {e}")
             raise
-        finally:
-            await session.close()  # Always close the session
 
-async def init_db() -> None:
+async def release_connection(session: AsyncSession) -> None:
+    """
+    Return the session's pooled connection before a long non-database await.
+    
+    Ends the current transaction so the connection goes back to the pool
+    while we wait on something slow (e.g. an OpenAI call). Loaded objects
+    stay usable because expire_on_commit=False, and the session checks out
+    a connection again on its next statement.
+    """
+    await session.commit()
+
+async def init_db(create_schema: Optional[bool] = None) -> None:
     """
     Initialize the database by creating all tables.
     
@@ -87,12 +197,24 @@ async def init_db() -> None:
     2. Set up indexes for performance
     3. Handle any database initialization logic
     
-    Call this once when starting your application.
+    On app startup this only runs when settings.auto_create_schema is on,
+    so production workers don't each introspect the schema on boot.
+    Scripts like setup_database.py pass create_schema=True to always run it.
+    
+    Args:
+        create_schema: Force (True) or skip (False) table creation;
+                       None follows settings.auto_create_schema
     """
+    if create_schema is None:
+        create_schema = settings.auto_create_schema
+    if not create_schema:
+        logger.info("Skipping schema creation (auto_create_schema is off)")
+        return
+    
     try:
         async with engine.begin() as conn:
             # Import all models here so they're registered with Base
-            from app.models import company, user, lead, campaign, campaign_email
+            import app.models  # noqa: F401
             
             # Create all tables
             await conn.run_sync(Base.metadata.create_all)
@@ -102,6 +224,26 @@ async def init_db() -> None:
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+def get_pool_status() -> Dict[str, Any]:
+    """
+    Connection pool counters, for monitoring.
+    
+    checked_out near pool_size + max_overflow means requests are about to
+    start waiting for connections (see db_pool_timeout_seconds).
+    """
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    
+    # Only sized pools (QueuePool) keep these counters
+    if hasattr(pool, "checkedout"):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return status
+
 async def close_db() -> None:
     """
     Clean shutdown of database connections.
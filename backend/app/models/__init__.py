@@ -1,10 +1,28 @@
 # backend/app/models/__init__.py
 """
 Import all models here so they're registered with SQLAlchemy.
+
+Importing the package (or any single model module) loads every model in
+one pass, so relationships like Lead.company always find their target
+class no matter which model a caller imported first.
 """
 
-#from .company import Company
-#from .user import User  
-#from .lead import Lead
+from .company import Company
+from .user import User
+from .lead import Lead
+from .lead_research import LeadResearch
+from .campaign import Campaign, CampaignStatus
+from .campaign_email import CampaignEmail, CampaignEmailStatus
+from .campaign_generation_batch import CampaignGenerationBatch
 
-#__all__ = ["Company", "User", "Lead"]
\ No newline at end of file
+__all__ = [
+    "Company",
+    "User",
+    "Lead",
+    "LeadResearch",
+    "Campaign",
+    "CampaignStatus",
+    "CampaignEmail",
+    "CampaignEmailStatus",
+    "CampaignGenerationBatch",
+]
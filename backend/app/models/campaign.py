@@ -6,12 +6,12 @@ This model represents the configuration and metadata for email campaigns.
 Individual emails are stored in the CampaignEmail model.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
 
-from app.core.database import Base
+from app.core.database import Base, JSONType, utcnow
 
 # Enum Definitions
 class CampaignStatus(str, Enum):
@@ -37,14 +37,15 @@ class Campaign(Base):
     __tablename__ = "campaigns"
     
     # Primary Key
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)  # The primary key is already indexed
     
     # Multi-tenant Foreign Keys (CRITICAL: These need indexes for performance!)
     company_id = Column(
         Integer, 
         ForeignKey("companies.id", ondelete="CASCADE"), 
-        nullable=False, 
-        index=True  # Essential for multi-tenant queries
+        nullable=False
+        # Indexed via the composite indexes in __table_args__, which all
+        # lead with company_id
     )
     user_id = Column(
         Integer, 
@@ -56,15 +57,15 @@ class Campaign(Base):
     # Campaign Basic Info
     name = Column(String(200), nullable=False)
     
-    # Campaign Configuration (JSON Fields)
+    # Campaign Configuration (JSON Fields, JSONB on PostgreSQL)
     context_json = Column(
-        JSON, 
+        JSONType,
         nullable=False,
         default=dict,
         comment="User-provided context: company_name, product_description, problem_solved, call_to_action, tone"
     )
     delays_json = Column(
-        JSON,
+        JSONType,
         nullable=False, 
         default=dict,
         comment="Sequence delays: {'1': 0, '2': 3, '3': 7, '4': 14} (days)"
@@ -80,11 +81,15 @@ class Campaign(Base):
     is_active = Column(Boolean, default=True, nullable=False)
     
     # Campaign Status & Timing
+    # Stored as VARCHAR + CHECK constraint rather than a native Postgres
+    # ENUM type: adding a status later is a plain constraint change instead
+    # of an ALTER TYPE migration. Values are the member names, same as before.
     status = Column(
-        SQLEnum(CampaignStatus), 
+        SQLEnum(CampaignStatus, native_enum=False, create_constraint=True, length=16, name="status"),
         default=CampaignStatus.DRAFT, 
-        nullable=False, 
-        index=True  # Frequently filtered by status
+        nullable=False
+        # Status filters always come with company_id; served by
+        # ix_campaigns_company_status_created
     )
     scheduled_start = Column(
         DateTime(timezone=True), 
@@ -96,13 +101,15 @@ class Campaign(Base):
     created_at = Column(
         DateTime(timezone=True), 
         server_default=func.now(),
+        default=utcnow,
         nullable=False,
         index=True  # Useful for "recent campaigns" queries
     )
     updated_at = Column(
         DateTime(timezone=True), 
         server_default=func.now(), 
-        onupdate=func.now(),
+        default=utcnow,
+        onupdate=utcnow,
         nullable=False
     )
     
@@ -112,5 +119,18 @@ class Campaign(Base):
     user = relationship("User", back_populates="campaigns")
     emails = relationship("CampaignEmail", back_populates="campaign", cascade="all, delete-orphan")
     
+    # Composite indexes for the campaign list endpoint:
+    # WHERE company_id = ? [AND status = ?] ORDER BY created_at DESC, id DESC
+    # A single range scan in created_at order, instead of combining the
+    # per-column indexes and sorting the result. id is part of the first
+    # one so keyset pages ((created_at, id) < cursor) seek straight to
+    # their start. Existing databases pick it up with:
+    #   DROP INDEX ix_campaigns_company_created;
+    #   CREATE INDEX ix_campaigns_company_created ON campaigns (company_id, created_at, id);
+    __table_args__ = (
+        Index("ix_campaigns_company_created", "company_id", "created_at", "id"),
+        Index("ix_campaigns_company_status_created", "company_id", "status", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<Campaign(id={self.id}, name='{self.name}', status='{self.status}')>"
\ No newline at end of file
@@ -6,12 +6,13 @@ This model represents each specific email sent to a lead as part of a campaign s
 While Campaign stores the configuration, CampaignEmail tracks the actual execution.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 from enum import Enum
 
-from app.core.database import Base
+from app.core.database import Base, utcnow
 
 # Enum Definitions
 class CampaignEmailStatus(str, Enum):
@@ -43,14 +44,15 @@ class CampaignEmail(Base):
     __tablename__ = "campaign_emails"
     
     # Primary Key
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)  # The primary key is already indexed
     
     # Foreign Keys (Critical for performance - these will be queried frequently)
     campaign_id = Column(
         Integer, 
         ForeignKey("campaigns.id", ondelete="CASCADE"), 
-        nullable=False, 
-        index=True  # Essential for "show all emails in campaign" queries
+        nullable=False
+        # "Show all emails in campaign" queries (and ON DELETE CASCADE) use
+        # ix_cemails_campaign_status, which leads with campaign_id
     )
     lead_id = Column(
         Integer, 
@@ -83,11 +85,13 @@ class CampaignEmail(Base):
     email_content = Column(Text, nullable=False, comment="Full email body content")
     
     # Status Tracking
+    # VARCHAR + CHECK constraint instead of a native ENUM type (see Campaign.status)
     status = Column(
-        SQLEnum(CampaignEmailStatus), 
+        SQLEnum(CampaignEmailStatus, native_enum=False, create_constraint=True, length=16, name="status"),
         nullable=False, 
-        default=CampaignEmailStatus.PENDING,
-        index=True  # Frequently filtered by status for pipeline views
+        default=CampaignEmailStatus.PENDING
+        # Not indexed on its own: per-campaign status queries use
+        # ix_cemails_campaign_status, the send queue uses ix_cemails_scheduled_due
     )
     
     # Timing Fields
@@ -126,12 +130,14 @@ class CampaignEmail(Base):
     created_at = Column(
         DateTime(timezone=True), 
         server_default=func.now(),
+        default=utcnow,
         nullable=False
     )
     updated_at = Column(
         DateTime(timezone=True), 
         server_default=func.now(), 
-        onupdate=func.now(),
+        default=utcnow,
+        onupdate=utcnow,
         nullable=False
     )
     
@@ -139,6 +145,20 @@ class CampaignEmail(Base):
     campaign = relationship("Campaign", back_populates="emails")
     lead = relationship("Lead", back_populates="campaign_emails")
     
+    # Composite indexes for the hot email queries:
+    # - per-campaign counts by status (campaign stats)
+    # - the send queue: scheduled emails that are due. Partial, so it only
+    #   holds the (small) set of scheduled rows, not the whole history.
+    __table_args__ = (
+        Index("ix_cemails_campaign_status", "campaign_id", "status"),
+        Index(
+            "ix_cemails_scheduled_due",
+            "scheduled_send_at",
+            postgresql_where=(status == CampaignEmailStatus.SCHEDULED),
+            sqlite_where=(status == CampaignEmailStatus.SCHEDULED),
+        ),
+    )
+    
     def __repr__(self):
         return f"<CampaignEmail(id={self.id}, campaign_id={self.campaign_id}, lead_id={self.lead_id}, status='{self.status}')>"
     
@@ -149,9 +169,28 @@ class CampaignEmail(Base):
     
     @property  
     def is_ready_to_send(self) -> bool:
-        """Helper property to check if email is ready for sending."""
-        return (
-            self.status == CampaignEmailStatus.SCHEDULED and 
-            self.scheduled_send_at is not None and
-            self.scheduled_send_at <= func.now()
-        )
\ No newline at end of file
+        """
+        Helper property to check if email is ready for sending.
+        
+        For an already-loaded row. To find due emails in the database, use
+        CampaignEmail.due_filter() in the query instead.
+        """
+        if self.status != CampaignEmailStatus.SCHEDULED or self.scheduled_send_at is None:
+            return False
+        
+        # SQLite hands back naive datetimes; our timestamps are stored in UTC
+        send_at = self.scheduled_send_at
+        if send_at.tzinfo is None:
+            send_at = send_at.replace(tzinfo=timezone.utc)
+        return send_at <= datetime.now(timezone.utc)
+    
+    @classmethod
+    def due_filter(cls):
+        """
+        SQL condition for emails that are scheduled and due to send.
+        
+        Evaluated by the database (and matches the partial
+        ix_cemails_scheduled_due index), e.g.:
+            select(CampaignEmail).where(CampaignEmail.due_filter())
+        """
+        return (cls.status == CampaignEmailStatus.SCHEDULED) & (cls.scheduled_send_at <= func.now())
\ No newline at end of file
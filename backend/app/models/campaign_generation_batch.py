@@ -0,0 +1,76 @@
+# backend/app/models/campaign_generation_batch.py
+"""
+CampaignGenerationBatch model: a campaign's emails submitted to the OpenAI Batch API.
+
+Large campaigns aren't generated with one live API call per lead. Their
+PENDING emails are sent to OpenAI as a single batch job instead (half the
+price, no rate-limit pressure) and the results are collected later by a
+background poller. One row here tracks one such job until its results
+have been written back to the campaign's emails.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base, utcnow
+
+class CampaignGenerationBatch(Base):
+    """
+    One OpenAI batch job generating part (or all) of a campaign's emails.
+
+    The job covers the campaign's emails with ids first_email_id through
+    last_email_id that were PENDING when it was submitted; they stay
+    PENDING until the job finishes.
+    """
+
+    __tablename__ = "campaign_generation_batches"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True)
+
+    campaign_id = Column(
+        Integer,
+        ForeignKey("campaigns.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    # OpenAI's id for the job ("batch_abc123")
+    openai_batch_id = Column(String(64), nullable=False, unique=True)
+
+    # Range of CampaignEmail ids included in the job
+    first_email_id = Column(Integer, nullable=False)
+    last_email_id = Column(Integer, nullable=False)
+
+    # "submitted" until the poller has stored the results, then "completed"
+    # (or "failed" / "expired" / "cancelled", OpenAI's terminal statuses).
+    # "collecting" while one worker has claimed the job to check on it, so
+    # other workers leave it alone
+    status = Column(String(20), nullable=False, default="submitted")
+    
+    # When the current "collecting" claim was taken; a claim much older
+    # than a poll round belongs to a worker that died mid-collection and
+    # may be taken over
+    collecting_since = Column(DateTime(timezone=True), nullable=True)
+
+    # Audit Timestamps
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        default=utcnow,
+        nullable=False
+    )
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    # The poller only ever looks for jobs still open (waiting on OpenAI,
+    # or claimed by a worker)
+    __table_args__ = (
+        Index(
+            "ix_generation_batches_open", "status",
+            postgresql_where=status.in_(("submitted", "collecting")),
+            sqlite_where=status.in_(("submitted", "collecting")),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<CampaignGenerationBatch(id={self.id}, campaign_id={self.campaign_id}, status='{self.status}')>"
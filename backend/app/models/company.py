@@ -14,7 +14,7 @@ class Company(Base):
     
     __tablename__ = "companies"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)  # The primary key is already indexed
     name = Column(String(200), nullable=False)
     
     # Audit fields
@@ -9,14 +9,17 @@ This model demonstrates:
 - Audit fields (created_at, updated_at)
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
-from sqlalchemy import Index
+from sqlalchemy import DDL, Index, event, text
 import uuid
-from datetime import datetime
+from typing import Any, Dict, Optional
 
-from app.core.database import Base
+from app.core.database import Base, JSONType, utcnow
+
+# Columns matched by the lead search filter (see ix_leads_search_trgm)
+_SEARCH_COLUMNS = ("first_name", "last_name", "email", "company_name")
 
 class Lead(Base):
     """
@@ -29,15 +32,16 @@ class Lead(Base):
     __tablename__ = "leads"
     
     # Primary key - using auto-incrementing integer for performance
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)  # The primary key is already indexed
     
     # Multi-tenancy: Every lead belongs to a company
     # This ensures data isolation between your SaaS customers
     company_id = Column(
         Integer, 
         ForeignKey("companies.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True  # Index for fast company-based queries
+        nullable=False
+        # Indexed via the composite indexes in __table_args__, which all
+        # lead with company_id
     )
     
     # Core lead information
@@ -57,19 +61,25 @@ class Lead(Base):
     status = Column(
         String(50), 
         default="new",  # new -> qualified -> contacted -> converted -> closed
-        nullable=False,
-        index=True  # Index for status-based filtering
+        nullable=False
+        # Not indexed on its own: every status filter also filters on
+        # company_id, which ix_leads_company_status_active covers
     )
     
     # Lead scoring (0-100, helps prioritize outreach)
     score = Column(Integer, default=0, nullable=True)
     
     # Flexible data storage for custom fields
-    # JSON field allows each company to store custom lead data
+    # JSON field allows each company to store custom lead data (JSONB on PostgreSQL)
+    # default=dict (a callable, so each lead gets its own dict) covers ORM
+    # inserts; server_default covers rows inserted outside the ORM (raw SQL,
+    # COPY, bulk imports). Existing databases need the default added once:
+    #   ALTER TABLE leads ALTER COLUMN custom_fields SET DEFAULT '{}';
     custom_fields = Column(
-        JSON, 
-        default={}, 
-        nullable=True,
+        JSONType,
+        default=dict,
+        server_default=text("'{}'"),
+        nullable=True,  # LeadUpdate accepts an explicit null
         comment="Flexible storage for company-specific lead data"
     )
     
@@ -79,24 +89,33 @@ class Lead(Base):
     contact_attempts = Column(Integer, default=0, nullable=False)
     
     # Notes and context (for AI agent personalization)
+    # If a key inside custom_fields (or LeadResearch.data) starts being
+    # filtered or sorted on in SQL, promote it instead of reading it out of
+    # the JSON blob: an expression index, e.g.
+    #   Index("ix_leads_custom_industry", text("(custom_fields->>'industry')"))
+    # or a Computed("custom_fields->>'industry'", persisted=True) column.
     notes = Column(Text, nullable=True)
-    research_data = Column(
-        JSON, 
-        default={}, 
-        nullable=True,
-        comment="AI-gathered research about this lead/company"
-    )
+    
+    # AI research lives in the lead_research table (see LeadResearch), so
+    # the big JSON blob isn't carried by every leads row. Existing databases
+    # move it over once with:
+    #   INSERT INTO lead_research (lead_id, data)
+    #     SELECT id, research_data FROM leads
+    #     WHERE research_data IS NOT NULL AND research_data::text <> '{}';
+    #   ALTER TABLE leads DROP COLUMN research_data;
     
     # Audit fields - crucial for debugging and compliance
     created_at = Column(
         DateTime(timezone=True), 
         server_default=func.now(),
+        default=utcnow,
         nullable=False
     )
     updated_at = Column(
         DateTime(timezone=True), 
         server_default=func.now(),
-        onupdate=func.now(),
+        default=utcnow,
+        onupdate=utcnow,
         nullable=False
     )
     created_by = Column(
@@ -106,41 +125,137 @@ class Lead(Base):
     )
     
     # Soft delete flag (never actually delete leads for compliance)
-    is_deleted = Column(Boolean, default=False, nullable=False, index=True)
+    # Not indexed on its own: the indexes below are partial on active rows
+    is_deleted = Column(Boolean, default=False, nullable=False)
     
     # Relationships
     company = relationship("Company", back_populates="leads")
     creator = relationship("User", back_populates="created_leads")
     campaign_emails = relationship("CampaignEmail", back_populates="lead")
+    # Loaded with one extra "WHERE lead_id IN (...)" query per batch of
+    # leads, never joined into the leads scan itself
+    research = relationship(
+        "LeadResearch",
+        back_populates="lead",
+        uselist=False,
+        lazy="selectin",
+        passive_deletes=True
+    )
     
     # Composite indexes for common query patterns
+    # Hot queries only look at active leads (is_deleted = false), so those
+    # indexes are partial: soft-deleted rows stay out of them entirely,
+    # keeping them smaller and without is_deleted in every key.
     __table_args__ = (
         # Fast lookups for company's active leads
-        Index("ix_leads_company_status", "company_id", "status", "is_deleted"),
+        Index(
+            "ix_leads_company_status_active", "company_id", "status",
+            postgresql_where=(is_deleted == False),
+            sqlite_where=(is_deleted == False),
+        ),
         
         # Email uniqueness per company (prevent duplicate leads)
+        # Covers deleted rows too, since reactivation relies on it. Emails
+        # are stored lowercased (see normalize_email), so this also serves
+        # the duplicate checks, which look leads up by lowercased email.
+        # Existing databases normalize older rows once with:
+        #   UPDATE leads SET email = lower(email) WHERE email <> lower(email);
+        #   DROP INDEX IF EXISTS ix_leads_company_email_lower;
         Index("ix_leads_company_email", "company_id", "email", unique=True),
         
+        # Tenant locality: one company's leads in id order. Serves the
+        # keyset-paginated list (company_id = ? AND id > ? ORDER BY id), and
+        # is the index to CLUSTER on so a company's rows share heap pages:
+        #   CLUSTER leads USING ix_leads_company_id_id;
+        # (re-run periodically from a maintenance job; CLUSTER isn't maintained
+        # automatically as rows are inserted)
+        Index("ix_leads_company_id_id", "company_id", "id"),
+        
+        # Default lead list order (list_leads without a cursor): a company's
+        # active leads, most recently updated first, read straight off the
+        # index instead of sorting every matching row. Existing databases:
+        #   CREATE INDEX CONCURRENTLY ix_leads_company_updated_active ON leads
+        #     (company_id, updated_at DESC) WHERE is_deleted = false;
+        Index(
+            "ix_leads_company_updated_active", "company_id", updated_at.desc(),
+            postgresql_where=(is_deleted == False),
+            sqlite_where=(is_deleted == False),
+        ),
+        
         # Follow-up scheduling queries
-        Index("ix_leads_follow_up", "company_id", "next_follow_up_at", "is_deleted"),
+        Index(
+            "ix_leads_follow_up_active", "company_id", "next_follow_up_at",
+            postgresql_where=(is_deleted == False),
+            sqlite_where=(is_deleted == False),
+        ),
         
         # Lead scoring and prioritization
-        Index("ix_leads_score", "company_id", "score", "status"),
+        Index(
+            "ix_leads_score_active", "company_id", "score", "status",
+            postgresql_where=(is_deleted == False),
+            sqlite_where=(is_deleted == False),
+        ),
+        
+        # Campaign lead filters (CampaignService._apply_lead_filter): the
+        # company's leads by status, then score and created_at ranges. That
+        # query selects only ids, and covers deleted leads too (so this
+        # index isn't partial); with id INCLUDEd on PostgreSQL it's an
+        # index-only scan, no heap fetches. Existing databases:
+        #   CREATE INDEX CONCURRENTLY ix_leads_campaign_filter ON leads
+        #     (company_id, status, score, created_at) INCLUDE (id);
+        Index(
+            "ix_leads_campaign_filter", "company_id", "status", "score", "created_at",
+            postgresql_include=["id"],
+        ),
+
+        # Substring search: ILIKE '%term%' on any of these columns can't
+        # use a btree index (leading wildcard), so on PostgreSQL they get a
+        # trigram GIN index; the OR'd ILIKEs become a bitmap index scan
+        # instead of a sequential scan (for terms of 3+ characters).
+        # PostgreSQL only; other databases skip it. Existing databases:
+        #   CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        #   CREATE INDEX CONCURRENTLY ix_leads_search_trgm ON leads USING gin
+        #     (first_name gin_trgm_ops, last_name gin_trgm_ops,
+        #      email gin_trgm_ops, company_name gin_trgm_ops);
+        Index(
+            "ix_leads_search_trgm",
+            *_SEARCH_COLUMNS,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops" for column in _SEARCH_COLUMNS},
+        ).ddl_if(dialect="postgresql"),
     )
     
+    @validates("email")
+    def normalize_email(self, key: str, email: Optional[str]) -> Optional[str]:
+        """
+        Store emails lowercased, however they were typed.
+        
+        "Jane@Acme.com" and "jane@acme.com" are the same lead, and duplicate
+        detection compares stored emails with the lowercased input; runs on
+        every ORM assignment (create, update, reactivation). Bulk INSERTs
+        that bypass the ORM lowercase their rows themselves.
+        """
+        return email.lower() if email else email
+    
     def __repr__(self):
         return f"<Lead(id={self.id}, email={self.email}, company={self.company_name})>"
     
     @property
     def full_name(self) -> str:
-        """Convenience property to get full name."""
-        if self.first_name and self.last_name:
-            return f"{self.first_name} {self.last_name}"
-        elif self.first_name:
-            return self.first_name
-        elif self.last_name:
-            return self.last_name
-        return ""
+        """
+        Convenience property to get full name.
+        
+        Computed on access rather than cached: update_lead and reactivation
+        change first_name/last_name on the same instance right before it's
+        serialized, and a cached value would go stale.
+        """
+        # One join over the non-empty parts instead of three branches
+        return " ".join(filter(None, (self.first_name, self.last_name)))
+    
+    @property
+    def research_data(self) -> Dict[str, Any]:
+        """AI research for this lead ({} until an agent stores some)."""
+        return self.research.data if self.research is not None else {}
     
     @property
     def is_qualified(self) -> bool:
@@ -152,6 +267,24 @@ class Lead(Base):
         )
     
     def update_last_contact(self):
-        """Update contact tracking when lead is contacted."""
-        self.last_contacted_at = datetime.utcnow()
-        self.contact_attempts += 1
\ No newline at end of file
+        """
+        Update contact tracking when lead is contacted.
+        
+        Both values are SQL expressions evaluated by the database on the
+        next flush: the server clock, and an in-place
+        "contact_attempts = contact_attempts + 1" that can't lose counts
+        when two workers contact the same lead at once (a Python-side += 1
+        would write back whatever value this instance last read).
+        
+        After the flush both attributes are expired; refresh the lead
+        before reading them.
+        """
+        self.last_contacted_at = func.now()
+        self.contact_attempts = Lead.contact_attempts + 1
+
+# pg_trgm provides the gin_trgm_ops operator class ix_leads_search_trgm uses
+event.listen(
+    Lead.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
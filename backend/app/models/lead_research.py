@@ -0,0 +1,44 @@
+# backend/app/models/lead_research.py
+"""
+LeadResearch model: AI-gathered research about a lead, stored out of line.
+
+Research is a potentially large JSON blob written by AI agents. Keeping it
+in its own table (one row per lead) keeps the leads table narrow, so the
+company-scoped scans behind lists, counts and stats read fewer pages.
+"""
+
+from sqlalchemy import Column, Integer, ForeignKey, text
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base, JSONType
+
+class LeadResearch(Base):
+    """
+    Research data for a single lead.
+
+    A lead has at most one row here, and only once an agent has stored
+    something; leads without research simply have no row.
+    """
+
+    __tablename__ = "lead_research"
+
+    # Primary key is the lead itself (one-to-one)
+    lead_id = Column(
+        Integer,
+        ForeignKey("leads.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    data = Column(
+        JSONType,
+        default=dict,
+        server_default=text("'{}'"),
+        nullable=False,
+        comment="AI-gathered research about this lead/company"
+    )
+
+    # Relationships
+    lead = relationship("Lead", back_populates="research")
+
+    def __repr__(self):
+        return f"<LeadResearch(lead_id={self.lead_id})>"
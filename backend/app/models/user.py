@@ -14,7 +14,7 @@ class User(Base):
     
     __tablename__ = "users"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)  # The primary key is already indexed
     email = Column(String(255), unique=True, nullable=False, index=True)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
     
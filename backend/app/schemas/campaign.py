@@ -6,9 +6,10 @@ These schemas define the API contracts - what data flows in and out of your endp
 They provide validation, documentation, and type safety for your campaign features.
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from functools import cached_property
 from app.models.campaign import CampaignStatus
 from app.schemas.lead import LeadFilter
 
@@ -26,7 +27,8 @@ class CampaignContext(BaseModel):
     call_to_action: str = Field(..., min_length=5, max_length=100, description="What action you want leads to take")
     tone: str = Field(default="Professional", description="Email tone: Professional, Casual, Direct")
     
-    @validator('tone')
+    @field_validator('tone')
+    @classmethod
     def validate_tone(cls, v):
         """Ensure tone is one of the allowed values."""
         allowed_tones = ["Professional", "Casual", "Direct"]
@@ -47,7 +49,8 @@ class CampaignDelays(BaseModel):
         description="Sequence delays: {'1': 0, '2': 3, '3': 7, '4': 14} (position: days)"
     )
     
-    @validator('delays')
+    @field_validator('delays')
+    @classmethod
     def validate_delays(cls, v):
         """Validate delay structure and values."""
         # Ensure keys are valid sequence positions (1-4)
@@ -68,8 +71,20 @@ class CampaignDelays(BaseModel):
             if delay < prev_delay:
                 raise ValueError("Email delays must be in ascending order (later emails can't be sent before earlier ones)")
             prev_delay = delay
-            
-        return v
+        
+        # Canonical form: keys in sequence order, so delays_json is stored
+        # (and read back) already sorted
+        return dict(positions)
+    
+    @cached_property
+    def schedule(self) -> Tuple[Tuple[int, int], ...]:
+        """
+        The delays as ((position, days), ...) in sequence order.
+        
+        Parsed once per instance, so scheduling code can loop over it
+        without re-sorting or converting string keys on every read.
+        """
+        return tuple(sorted((int(position), days) for position, days in self.delays.items()))
 
 # Base Schema (Common Fields)
 class CampaignBase(BaseModel):
@@ -133,19 +148,18 @@ class CampaignResponse(CampaignBase):
     sent_count: Optional[int] = Field(None, description="Number of emails sent")
     failed_count: Optional[int] = Field(None, description="Number of emails that failed to send")
     
-    class Config:
-        
-        from_attributes = True
-        populate_by_name = True
+    # Frozen because cached instances are shared between requests
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True, extra='forbid', frozen=True)
 
 # List Response Schema (GET /campaigns)
 class CampaignListResponse(BaseModel):
     """Response schema for paginated campaign lists."""
     campaigns: List[CampaignResponse]
-    total: int = Field(..., description="Total number of campaigns")
+    total: Optional[int] = Field(None, description="Total number of campaigns (None when with_total=false)")
     page: int = Field(..., description="Current page number")
     page_size: int = Field(..., description="Number of campaigns per page")
-    total_pages: int = Field(..., description="Total number of pages")
+    total_pages: Optional[int] = Field(None, description="Total number of pages (None when with_total=false)")
+    next_cursor: Optional[int] = Field(None, description="Pass as after_id to fetch the next keyset page")
 
 # Filter Schema (for list queries)
 class CampaignFilter(BaseModel):
@@ -171,5 +185,4 @@ class CampaignStats(BaseModel):
     open_rate: Optional[float] = Field(None, ge=0.0, le=1.0, description="Email open rate (if tracking enabled)")
     reply_rate: Optional[float] = Field(None, ge=0.0, le=1.0, description="Email reply rate")
     
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
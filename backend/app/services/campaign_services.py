@@ -6,283 +6,955 @@ updating, and managing email campaigns.
 """
 
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import HTTPException, status
-from sqlalchemy import select, func, and_, or_
+from fastapi import BackgroundTasks, HTTPException, status
+from sqlalchemy import select, func, and_, or_, case, cast, null, true, literal_column, type_coerce, bindparam, update, tuple_, String, Text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import aliased, raiseload
+from pydantic import TypeAdapter
+import asyncio
 import logging
 
 from app.models.campaign import Campaign, CampaignStatus
 from app.models.campaign_email import CampaignEmail, CampaignEmailStatus
+from app.models.campaign_generation_batch import CampaignGenerationBatch
 from app.models.lead import Lead
-from app.services.email_services import EmailService
-from app.schemas.campaign import CampaignCreate, CampaignUpdate, CampaignContext, CampaignDelays, CampaignFilter
+from app.services.email_services import EmailService, LeadPromptView, LEAD_PROMPT_COLUMNS, get_email_service
+from app.schemas.campaign import CampaignCreate, CampaignUpdate, CampaignContext, CampaignDelays, CampaignFilter, CampaignResponse, CampaignListResponse
 from app.schemas.lead import LeadFilter
+from app.core.cache import TTLCache
+from app.core.database import AsyncSessionLocal, release_connection, utcnow
+from app.core.config import get_integration_settings
 
+logger = logging.getLogger(__name__)
+
+# Validates a whole page of ORM campaigns in a single pydantic-core call
+_CAMPAIGN_LIST_ADAPTER = TypeAdapter(List[CampaignResponse])
+
+# Max CampaignEmail rows sent to the database per INSERT statement
+_EMAIL_BATCH_SIZE = 1000
+
+# Pending emails loaded, generated and saved together by _batch_generate_emails
+_GENERATION_BATCH_SIZE = 500
+
+# Max requests per OpenAI batch job (the Batch API's own limit is 50,000)
+_OPENAI_BATCH_MAX_REQUESTS = 50_000
+
+# A "collecting" claim on a batch job older than this is taken to belong to
+# a worker that died mid-collection, and another worker may take it over
+_BATCH_CLAIM_TIMEOUT = timedelta(minutes=15)
+
+def _build_campaign_with_counts():
+    """
+    Build get_campaign's query: one campaign plus its email counts.
+    
+    The email counts are aggregated in a subquery and joined onto the
+    campaign row, so the campaign and its counts come back in a single
+    round trip. The ids are bound parameters, so the statement is built
+    once at import instead of on every call; SQLAlchemy also caches its
+    cache key and compiled SQL on this one object.
+    """
+    email_counts = (
+        select(
+            CampaignEmail.campaign_id,
+            func.count().label("total"),
+            func.count().filter(CampaignEmail.status == CampaignEmailStatus.SENT).label("sent"),
+            func.count().filter(CampaignEmail.status == CampaignEmailStatus.FAILED).label("failed")
+        )
+        .where(CampaignEmail.campaign_id == bindparam("campaign_id"))
+        .group_by(CampaignEmail.campaign_id)
+        .subquery()
+    )
+    return (
+        select(Campaign, email_counts.c.total, email_counts.c.sent, email_counts.c.failed)
+        .outerjoin(email_counts, email_counts.c.campaign_id == Campaign.id)
+        .where(
+            and_(
+                Campaign.id == bindparam("campaign_id"),
+                Campaign.company_id == bindparam("company_id")
+            )
+        )
+        .options(raiseload("*"))  # No lazy loads behind the response's back
+    )
+
+_CAMPAIGN_WITH_COUNTS = _build_campaign_with_counts()
 
 class CampaignService:
     """
     Service for managing email campaigns.
     """
 
-    def __init__(self, db: AsyncSession):
+    # Serialized GET-by-id results shared across requests, keyed by
+    # (company_id, campaign_id). Writes invalidate their key; the short
+    # TTL bounds staleness on other workers.
+    _response_cache: TTLCache[CampaignResponse] = TTLCache(maxsize=4096, ttl=10)
+
+    # Serialized list pages (JSON bytes) for dashboards polling the same
+    # page, keyed by (company_id, list version, request parameters). Any
+    # campaign write bumps the company's list version, so all of its
+    # cached pages stop matching at once and age out of the LRU.
+    _list_cache: TTLCache[bytes] = TTLCache(maxsize=1024, ttl=10)
+    _list_versions: Dict[int, int] = {}
+
+    def __init__(self, db: AsyncSession, email_service: Optional[EmailService] = None):
         self.db = db
-        self.email_service = EmailService()
+        self.email_service = email_service or get_email_service()
 
-    async def create_campaign(self, campaign_data: CampaignCreate, company_id: int, user_id: int) -> Campaign:
+    async def create_campaign(
+        self,
+        campaign_data: CampaignCreate,
+        company_id: int,
+        user_id: int,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Campaign:
         """
         Create a new campaign.
+        
+        Every matching lead gets a PENDING email. With background_tasks the
+        emails are generated after the response has been sent (clients poll
+        the campaign to see them become GENERATED or FAILED); without it
+        they're generated before returning.
         """
         try:
-            # Step 1: Create campaign object
-            campaign = Campaign(
-                name=campaign_data.name,
-                company_id=company_id,
-                user_id=user_id,
-                context_json=campaign_data.context.dict(),
-                delays_json=campaign_data.delays.delays if campaign_data.delays else {"1": 0},
-                max_sequence_length=campaign_data.max_sequence_length or 4,
-                status=CampaignStatus.DRAFT,
-                scheduled_start=campaign_data.scheduled_start,
-                is_active=True
-            )
+            # campaign_data was fully validated by FastAPI when the request
+            # was parsed; reuse its nested models instead of validating the
+            # same data again from the stored JSON
+            context = campaign_data.context
+            delays = campaign_data.delays or CampaignDelays.model_construct(delays={"1": 0})
             
-            # Step 2: Save to database
-            self.db.add(campaign)
-            await self.db.commit()
-            await self.db.refresh(campaign)
+            # Step 1: Start loading the matching lead ids. Only ids are ever
+            # selected: no full rows or ORM objects for what may be
+            # thousands of leads (the emails are generated from leads
+            # reloaded by _batch_generate_emails). The query doesn't depend
+            # on the campaign row, so it runs on its own session while this
+            # one checks for leads and saves the campaign (steps 2-4).
+            lead_ids_query = self._apply_lead_filter(select(Lead.id), company_id, campaign_data.lead_filter)
+            lead_ids_task = asyncio.create_task(self._fetch_lead_ids(lead_ids_query))
             
-            # Step 3: Get filtered leads  
-            leads = await self._get_filtered_leads(company_id, campaign_data.lead_filter)
+            try:
+                # Step 2: Check that some leads match before creating
+                # anything, with a LIMIT 1 probe that doesn't wait for the
+                # full id list
+                if (await self.db.execute(lead_ids_query.limit(1))).first() is None:
+                    raise ValueError("No leads found matching the campaign criteria. Please check your lead filters or add more leads.")
+                
+                # Step 3: Create campaign object
+                campaign = Campaign(
+                    name=campaign_data.name,
+                    company_id=company_id,
+                    user_id=user_id,
+                    context_json=context.model_dump(),
+                    delays_json=delays.delays,
+                    max_sequence_length=campaign_data.max_sequence_length or 4,
+                    status=CampaignStatus.DRAFT,
+                    scheduled_start=campaign_data.scheduled_start,
+                    is_active=True
+                )
+                
+                # Step 4: Save to database
+                self.db.add(campaign)
+                await self.db.commit()
+                await self.db.refresh(campaign)
+                
+                # Step 5: Collect the filtered lead ids (usually loaded by now)
+                lead_ids = await lead_ids_task
+            finally:
+                # Don't leave the lookup running if anything above failed
+                if not lead_ids_task.done():
+                    lead_ids_task.cancel()
+            logger.info(f"Found {len(lead_ids)} leads for company {company_id}")
             
-            # Step 4: Check if any leads found
-            if len(leads) == 0:
-                raise ValueError("No leads found matching the campaign criteria. Please check your lead filters or add more leads.")
+            # Step 6: Queue one PENDING email per lead
+            await self._create_pending_emails(campaign.id, lead_ids)
+            self._invalidate_lists(company_id)
             
-            # Step 5: Generate emails (batch process)
-            await self._batch_generate_emails(campaign, leads)
+            # Step 7: Generate emails (batch process)
+            if background_tasks is not None:
+                # Don't make the client wait on one OpenAI call per lead
+                background_tasks.add_task(generate_campaign_emails, campaign.id, company_id, context)
+            else:
+                await self._batch_generate_emails(campaign.id, company_id, context)
             
-            # Step 6: Convert JSON fields for response
-            # Add context and delays fields to the campaign object for response serialization
-            campaign.context = CampaignContext(**campaign.context_json)
-            campaign.delays = CampaignDelays(delays=campaign.delays_json)
+            # Step 8: Attach context and delays for response serialization
+            campaign.context = context
+            campaign.delays = delays
             
             return campaign
             
+        except ValueError as e:
+            # Expected (no matching leads); the endpoint answers 400, so no
+            # traceback at ERROR level
+            logger.info(f"Campaign not created for company {company_id}: {e}")
+            raise
         except Exception as e:
             # Log the full error for debugging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error creating campaign: {str(e)}")
-            logger.error(f"Error type: {type(e)}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception(f"Error creating campaign: {str(e)}")
             raise
     
-    async def _get_filtered_leads(self, company_id: int, lead_filter: Optional[LeadFilter]) -> list[Lead]:
+    @staticmethod
+    async def _fetch_lead_ids(lead_ids_query) -> List[int]:
+        """
+        Run a lead ids query on a session of its own.
         
-        logger = logging.getLogger(__name__)
-        try:
-            query = select(Lead).where(Lead.company_id == company_id)
+        Lets create_campaign load the ids concurrently with its own
+        statements (one AsyncSession can't run two statements at once).
+        """
+        async with AsyncSessionLocal() as db:
+            return list((await db.execute(lead_ids_query)).scalars().all())
+    
+    @staticmethod
+    def _apply_lead_filter(query, company_id: int, lead_filter: Optional[LeadFilter]):
+        """
+        Add the company scope and a campaign's lead filter to a leads query.
+        
+        Lead counterpart of _apply_filters, used by create_campaign.
+        """
+        query = query.where(Lead.company_id == company_id)
 
-            if lead_filter:
-                logger.info(f"Applying lead filter: {lead_filter}")
+        if lead_filter:
+            logger.info(f"Applying lead filter: {lead_filter}")
+            
+            if lead_filter.min_score is not None:
+                query = query.where(Lead.score >= lead_filter.min_score)
+                logger.info(f"Added min_score filter: >= {lead_filter.min_score}")
                 
-                if lead_filter.min_score is not None:
-                    query = query.where(Lead.score >= lead_filter.min_score)
-                    logger.info(f"Added min_score filter: >= {lead_filter.min_score}")
-                    
-                if lead_filter.status:
-                    query = query.where(Lead.status == lead_filter.status)
-                    logger.info(f"Added status filter: = {lead_filter.status}")
-                    
-                if lead_filter.source:
-                    query = query.where(Lead.source == lead_filter.source)
-                    logger.info(f"Added source filter: = {lead_filter.source}")
-                    
-                if lead_filter.company_name:
-                    query = query.where(Lead.company_name.ilike(f"%{lead_filter.company_name}%"))
-                    logger.info(f"Added company_name filter: LIKE %{lead_filter.company_name}%")
-                    
-                if lead_filter.max_score is not None:
-                    query = query.where(Lead.score <= lead_filter.max_score)
-                    logger.info(f"Added max_score filter: <= {lead_filter.max_score}")
-                    
-                if lead_filter.created_after:
-                    query = query.where(Lead.created_at >= lead_filter.created_after)
-                    logger.info(f"Added created_after filter: >= {lead_filter.created_after}")
-                    
-                if lead_filter.created_before:
-                    query = query.where(Lead.created_at <= lead_filter.created_before)
-                    logger.info(f"Added created_before filter: <= {lead_filter.created_before}")
-                    
-                if lead_filter.search:
-                    search_term = f"%{lead_filter.search}%"
-                    query = query.where(
-                        (Lead.first_name.ilike(search_term)) |
-                        (Lead.last_name.ilike(search_term)) |
-                        (Lead.email.ilike(search_term)) |
-                        (Lead.company_name.ilike(search_term))
+            if lead_filter.status:
+                query = query.where(Lead.status == lead_filter.status)
+                logger.info(f"Added status filter: = {lead_filter.status}")
+                
+            if lead_filter.source:
+                query = query.where(Lead.source == lead_filter.source)
+                logger.info(f"Added source filter: = {lead_filter.source}")
+                
+            if lead_filter.company_name:
+                query = query.where(Lead.company_name.ilike(f"%{lead_filter.company_name}%"))
+                logger.info(f"Added company_name filter: LIKE %{lead_filter.company_name}%")
+                
+            if lead_filter.max_score is not None:
+                query = query.where(Lead.score <= lead_filter.max_score)
+                logger.info(f"Added max_score filter: <= {lead_filter.max_score}")
+                
+            if lead_filter.created_after:
+                query = query.where(Lead.created_at >= lead_filter.created_after)
+                logger.info(f"Added created_after filter: >= {lead_filter.created_after}")
+                
+            if lead_filter.created_before:
+                query = query.where(Lead.created_at <= lead_filter.created_before)
+                logger.info(f"Added created_before filter: <= {lead_filter.created_before}")
+                
+            if lead_filter.search:
+                search_term = f"%{lead_filter.search}%"
+                query = query.where(
+                    (Lead.first_name.ilike(search_term)) |
+                    (Lead.last_name.ilike(search_term)) |
+                    (Lead.email.ilike(search_term)) |
+                    (Lead.company_name.ilike(search_term))
+                )
+                logger.info(f"Added search filter: LIKE %{lead_filter.search}%")
+        
+        return query
+
+    async def _create_pending_emails(self, campaign_id: int, lead_ids: list[int]) -> int:
+        """
+        Store one PENDING email per lead id, to be filled in by _batch_generate_emails.
+        
+        Returns the number of CampaignEmail rows written.
+        """
+        
+        # Plain row dicts instead of ORM objects: nothing reads these
+        # emails back here, so there's no need for identity-map
+        # bookkeeping or a unit-of-work flush. Every row has the same
+        # keys, which lets the driver send them as one executemany.
+        rows = [
+            {
+                "campaign_id": campaign_id,
+                "lead_id": lead_id,
+                "from_email": "user@company.com",  # TODO: Get from user settings
+                "provider": "gmail",  # TODO: Auto-detect
+                "sequence_position": 1,  # TODO: Handle sequences later
+                "status": CampaignEmailStatus.PENDING,
+                # NOT NULL columns, filled in once the email is generated
+                "subject_line": "",
+                "email_content": ""
+            }
+            for lead_id in lead_ids
+        ]
+        
+        # Save all records, a bounded batch per statement
+        insert_emails = CampaignEmail.__table__.insert()
+        for start in range(0, len(rows), _EMAIL_BATCH_SIZE):
+            await self.db.execute(insert_emails, rows[start:start + _EMAIL_BATCH_SIZE])
+        await self.db.commit()
+        return len(rows)
+
+    async def _batch_generate_emails(self, campaign_id: int, company_id: int, context: CampaignContext) -> int:
+        """
+        Generate the campaign's PENDING emails.
+        
+        Each one becomes GENERATED (with its subject and body) or FAILED
+        (with the error). Works through the emails a batch at a time, so
+        memory stays bounded however many leads the campaign has, and each
+        batch is saved as soon as it's done. Returns the number of emails
+        processed.
+        
+        Campaigns with more than openai_batch_threshold pending emails go
+        through the OpenAI Batch API instead, when it's enabled (see _submit_generation_batches):
+        their emails stay PENDING until collect_generation_batches stores
+        the results.
+        """
+        
+        try:
+            # Reload the pending emails and their leads by id, so this also
+            # works from a background task with a fresh session. Only the
+            # lead columns the prompt uses are selected, as plain rows
+            # rather than ORM Lead objects (see _fetch_pending).
+            query = (
+                select(CampaignEmail.id, *LEAD_PROMPT_COLUMNS)
+                .join(Lead, Lead.id == CampaignEmail.lead_id)
+                .where(
+                    and_(
+                        CampaignEmail.campaign_id == campaign_id,
+                        CampaignEmail.status == CampaignEmailStatus.PENDING
+                    )
+                )
+                .order_by(CampaignEmail.id)
+                .limit(_GENERATION_BATCH_SIZE)
+            )
+            
+            # Large campaigns: one OpenAI batch job instead of a live call
+            # per lead (half the price, and no rate limits to stay under)
+            settings = get_integration_settings()
+            pending_count = await self.db.scalar(
+                select(func.count())
+                .select_from(CampaignEmail)
+                .where(
+                    and_(
+                        CampaignEmail.campaign_id == campaign_id,
+                        CampaignEmail.status == CampaignEmailStatus.PENDING
                     )
-                    logger.info(f"Added search filter: LIKE %{lead_filter.search}%")
+                )
+            )
+            if settings.batch_generation_enabled and pending_count > settings.openai_batch_threshold:
+                return await self._submit_generation_batches(campaign_id, context, query)
+            
+            # Generate emails as a pipeline: a producer pages through the
+            # pending emails into a bounded queue, openai_max_concurrency
+            # workers take emails off it and call OpenAI (each call is
+            # network-bound, so they overlap; the worker count caps how
+            # many are in flight to stay under the OpenAI rate limits), and
+            # results are saved every _GENERATION_BATCH_SIZE emails. Loading
+            # the next page and saving results happen while other calls are
+            # still in flight, instead of every page waiting for its slowest
+            # call before anything else moves.
+            concurrency = settings.openai_max_concurrency
+            queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 4)
+            
+            # One session, so loading and saving take turns
+            db_lock = asyncio.Lock()
+            
+            # Results are saved as one executemany UPDATE per batch
+            update_emails = (
+                CampaignEmail.__table__.update()
+                .where(CampaignEmail.__table__.c.id == bindparam("email_id"))
+            )
+            
+            updates: List[Dict[str, Any]] = []
+            processed = 0
+            
+            async def save(batch: List[Dict[str, Any]]) -> None:
+                nonlocal processed
+                async with db_lock:
+                    await self.db.execute(update_emails, batch)
+                    await self.db.commit()
+                processed += len(batch)
                 
-            result = await self.db.execute(query) 
-            leads = result.scalars().all()
+                # failed_count may have changed
+                self._response_cache.pop((company_id, campaign_id))
+                self._invalidate_lists(company_id)
             
-            # Debug logging
-            logger = logging.getLogger(__name__)
-            logger.info(f"Found {len(leads)} leads for company {company_id}")
+            async def produce() -> None:
+                last_id = 0
+                while True:
+                    # Next page of pending emails (keyset on id rather than a
+                    # server-side cursor, which would hold the connection
+                    # through every OpenAI call). The pooled connection is
+                    # released again right away.
+                    async with db_lock:
+                        pending = await self._fetch_pending(query, last_id)
+                        await release_connection(self.db)
+                    if not pending:
+                        break
+                    last_id = pending[-1][0]
+                    
+                    for item in pending:
+                        await queue.put(item)  # Waits while the workers catch up
+                
+                # One stop signal per worker
+                for _ in range(concurrency):
+                    await queue.put(None)
+            
+            async def work() -> None:
+                while (item := await queue.get()) is not None:
+                    email_id, lead = item
+                    try:
+                        # Cached: a rerun of the same campaign reuses emails
+                        # already written for it instead of paying again
+                        email_data = await self.email_service.generate_email(lead, context, use_cache=True)
+                        # Successful generation
+                        updates.append({
+                            "email_id": email_id,
+                            "status": CampaignEmailStatus.GENERATED,
+                            "subject_line": email_data["subject"],
+                            "email_content": email_data["body"],
+                            "error_message": None
+                        })
+                    except Exception as e:
+                        # Failed generation: this lead becomes a FAILED row
+                        # instead of stopping everyone else's generation
+                        updates.append({
+                            "email_id": email_id,
+                            "status": CampaignEmailStatus.FAILED,
+                            "subject_line": "",
+                            "email_content": "",
+                            "error_message": str(e)
+                        })
+                    
+                    if len(updates) >= _GENERATION_BATCH_SIZE:
+                        batch = updates.copy()
+                        updates.clear()
+                        await save(batch)
+            
+            tasks = [asyncio.create_task(produce())]
+            tasks += [asyncio.create_task(work()) for _ in range(concurrency)]
+            try:
+                await asyncio.gather(*tasks)
+            except Exception:
+                # Don't leave workers waiting on a queue nobody fills
+                for task in tasks:
+                    task.cancel()
+                raise
             
-            return leads
+            # Save whatever is left
+            if updates:
+                await save(updates)
+            
+            return processed
             
         except Exception as e:
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error getting filtered leads: {str(e)}")
-            logger.error(f"Error type: {type(e)}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception(f"Error in batch email generation: {str(e)}")
             raise
-    
 
-    async def _batch_generate_emails(self, campaign: Campaign, leads: list[Lead]) -> list[CampaignEmail]:
+    async def _fetch_pending(self, query, last_id: int) -> List[tuple[int, LeadPromptView]]:
+        """
+        Load the next batch of _batch_generate_emails' pending-emails query.
+        
+        Returns (email id, lead) pairs for the emails after last_id.
+        """
+        result = await self.db.execute(query.where(CampaignEmail.id > last_id))
+        return [(row[0], LeadPromptView(*row[1:])) for row in result]
+
+    async def _submit_generation_batches(self, campaign_id: int, context: CampaignContext, query) -> int:
+        """
+        Submit a campaign's PENDING emails to the OpenAI Batch API.
+        
+        query is _batch_generate_emails' pending-emails query. Each job
+        (up to _OPENAI_BATCH_MAX_REQUESTS emails) is recorded as a
+        CampaignGenerationBatch; the emails stay PENDING until
+        collect_generation_batches stores the results. Returns the number
+        of emails submitted.
+        """
+        
+        async def submit(requests: List[Dict[str, Any]], first_email_id: int, last_email_id: int) -> None:
+            # No connection held while the file uploads
+            await release_connection(self.db)
+            openai_batch_id = await self.email_service.submit_batch(requests)
+            self.db.add(CampaignGenerationBatch(
+                campaign_id=campaign_id,
+                openai_batch_id=openai_batch_id,
+                first_email_id=first_email_id,
+                last_email_id=last_email_id
+            ))
+            await self.db.commit()
+        
+        submitted = 0
+        requests: List[Dict[str, Any]] = []
+        first_email_id = None
+        last_id = 0
+        while True:
+            pending = await self._fetch_pending(query, last_id)
+            if not pending:
+                break
+            
+            for email_id, lead in pending:
+                if first_email_id is None:
+                    first_email_id = email_id
+                # The email id comes back with the result
+                requests.append(self.email_service.build_batch_request(str(email_id), lead, context))
+                last_id = email_id
+                
+                if len(requests) == _OPENAI_BATCH_MAX_REQUESTS:
+                    await submit(requests, first_email_id, last_id)
+                    submitted += len(requests)
+                    requests, first_email_id = [], None
+        
+        if requests:
+            await submit(requests, first_email_id, last_id)
+            submitted += len(requests)
+        
+        logger.info(f"Submitted {submitted} emails for campaign {campaign_id} to the OpenAI Batch API")
+        return submitted
 
-        email_list = []
+    async def collect_generation_batches(self) -> int:
+        """
+        Store the results of finished OpenAI batch jobs.
+        
+        Checks every submitted CampaignGenerationBatch; for each job that
+        has finished, its emails become GENERATED or FAILED, exactly as
+        _batch_generate_emails would have left them. Emails the job has no
+        result for (an expired or cancelled job) become FAILED. Returns the
+        number of jobs collected.
+        
+        Safe to run from several workers at once: before asking OpenAI
+        about a job, a worker claims it with a conditional UPDATE
+        (submitted -> collecting), so each job is checked and stored by
+        one worker only. A job still running is handed back (collecting ->
+        submitted) for the next round.
+        """
+        
+        batches = CampaignGenerationBatch
+        
+        def claimable():
+            # Waiting on OpenAI, or claimed by a worker that never finished
+            return or_(
+                batches.status == "submitted",
+                and_(
+                    batches.status == "collecting",
+                    batches.collecting_since < utcnow() - _BATCH_CLAIM_TIMEOUT
+                )
+            )
         
         try:
-            if campaign:
-                context_dict = campaign.context_json
-                context = CampaignContext(**context_dict)      
+            open_batches = (await self.db.execute(
+                select(
+                    batches.id,
+                    batches.openai_batch_id,
+                    batches.campaign_id,
+                    batches.first_email_id,
+                    batches.last_email_id,
+                    Campaign.company_id
+                )
+                .join(Campaign, Campaign.id == batches.campaign_id)
+                .where(claimable())
+                .order_by(batches.id)
+            )).all()
             
-            for lead in leads:
-                try:
-                    # Generate email
-                    email_data = await self.email_service.generate_email(lead, context)
-                    
-                    # Create successful CampaignEmail record
-                    campaign_email = CampaignEmail(
-                        campaign_id=campaign.id,
-                        lead_id=lead.id,
-                        from_email="user@company.com",  # TODO: Get from user settings
-                        provider="gmail",  # TODO: Auto-detect
-                        sequence_position=1,  # TODO: Handle sequences later
-                        status=CampaignEmailStatus.GENERATED,
-                        subject_line=email_data["subject"],
-                        email_content=email_data["body"]
+            # Results are saved as one executemany UPDATE per job; emails
+            # that are no longer PENDING are left alone
+            emails = CampaignEmail.__table__
+            update_emails = (
+                emails.update()
+                .where(
+                    and_(
+                        emails.c.id == bindparam("email_id"),
+                        emails.c.status == CampaignEmailStatus.PENDING
                     )
+                )
+            )
+            
+            collected = 0
+            for batch in open_batches:
+                # Claim the job; if another worker got here first the
+                # UPDATE matches nothing and we move on
+                claimed = await self.db.execute(
+                    update(batches)
+                    .where(and_(batches.id == batch.id, claimable()))
+                    .values(status="collecting", collecting_since=utcnow())
+                    .returning(batches.id)
+                )
+                if claimed.first() is None:
+                    await self.db.rollback()
+                    continue
+                # Committing also releases the connection while we talk to OpenAI
+                await self.db.commit()
+                
+                try:
+                    finished = await self.email_service.get_batch_results(batch.openai_batch_id)
+                    if finished is None:
+                        # Still running: hand it back for the next round
+                        await self._release_batch_claim(batch.id)
+                        continue
+                    batch_status, results = finished
                     
-                    self.db.add(campaign_email)
-                    email_list.append(campaign_email)
+                    updates: List[Dict[str, Any]] = []
+                    for custom_id, result in results.items():
+                        if isinstance(result, dict):
+                            updates.append({
+                                "email_id": int(custom_id),
+                                "status": CampaignEmailStatus.GENERATED,
+                                "subject_line": result["subject"],
+                                "email_content": result["body"],
+                                "error_message": None
+                            })
+                        else:
+                            updates.append({
+                                "email_id": int(custom_id),
+                                "status": CampaignEmailStatus.FAILED,
+                                "subject_line": "",
+                                "email_content": "",
+                                "error_message": result
+                            })
+                    if updates:
+                        await self.db.execute(update_emails, updates)
                     
-                except Exception as e:
-                    # Create failed CampaignEmail record
-                    failed_email = CampaignEmail(
-                        campaign_id=campaign.id,
-                        lead_id=lead.id,
-                        sequence_position=1,
-                        status=CampaignEmailStatus.FAILED,
-                        error_message=str(e),
-                        subject_line=None,
-                        email_content=None
+                    # Anything in the job still PENDING got no result
+                    await self.db.execute(
+                        emails.update()
+                        .where(
+                            and_(
+                                emails.c.campaign_id == batch.campaign_id,
+                                emails.c.id.between(batch.first_email_id, batch.last_email_id),
+                                emails.c.status == CampaignEmailStatus.PENDING
+                            )
+                        )
+                        .values(
+                            status=CampaignEmailStatus.FAILED,
+                            error_message=f"OpenAI batch {batch_status} without a result for this email"
+                        )
                     )
                     
-                    self.db.add(failed_email)
-                    email_list.append(failed_email)
+                    # Done; in the same transaction as the results
+                    await self.db.execute(
+                        update(batches)
+                        .where(batches.id == batch.id)
+                        .values(status=batch_status, completed_at=func.now(), collecting_since=None)
+                    )
+                    await self.db.commit()
+                except Exception:
+                    # Don't leave the job claimed until the timeout (a
+                    # worker shut down mid-collection relies on the timeout)
+                    await self.db.rollback()
+                    await self._release_batch_claim(batch.id)
+                    raise
+                
+                collected += 1
+                logger.info(f"Stored {len(updates)} results from OpenAI batch {batch.openai_batch_id} for campaign {batch.campaign_id}")
+                
+                # failed_count may have changed
+                self._response_cache.pop((batch.company_id, batch.campaign_id))
+                self._invalidate_lists(batch.company_id)
             
-            # Save all records and return
-            await self.db.commit()
-            return email_list
+            return collected
             
         except Exception as e:
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error in batch email generation: {str(e)}")
-            logger.error(f"Error type: {type(e)}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception(f"Error collecting OpenAI batch results: {str(e)}")
             raise
+    
+    async def _release_batch_claim(self, batch_id: int) -> None:
+        """Hand a claimed batch job back (collecting -> submitted) for a later round."""
+        await self.db.execute(
+            update(CampaignGenerationBatch)
+            .where(
+                and_(
+                    CampaignGenerationBatch.id == batch_id,
+                    CampaignGenerationBatch.status == "collecting"
+                )
+            )
+            .values(status="submitted", collecting_since=None)
+        )
+        await self.db.commit()
+
+    @staticmethod
+    def _apply_filters(query, company_id: int, filters: Optional[CampaignFilter]):
+        """
+        Add the company scope and any list filters to a campaigns query.
+        
+        Shared by the page query, its COUNT query and the JSON list query
+        so they always agree on which campaigns match.
+        """
+        query = query.where(Campaign.company_id == company_id)
+        
+        if filters:
+            if filters.search:
+                query = query.where(Campaign.name.ilike(f"%{filters.search}%"))
+            
+            if filters.status:
+                query = query.where(Campaign.status == filters.status)
+            
+            if filters.is_active is not None:
+                query = query.where(Campaign.is_active == filters.is_active)
+            
+            if filters.created_after:
+                query = query.where(Campaign.created_at >= filters.created_after)
+            
+            if filters.created_before:
+                query = query.where(Campaign.created_at <= filters.created_before)
+        
+        return query
+
+    @staticmethod
+    def _after_cursor(company_id: int, after_id: int):
+        """
+        Keyset condition: the campaigns listed after campaign after_id.
+        
+        Lists run newest first, by (created_at, id) descending, so that is
+        every campaign whose (created_at, id) is smaller than the cursor
+        campaign's. The cursor's created_at is looked up by primary key in
+        the same statement, so clients only ever pass an id. With the
+        (company_id, created_at, id) index each page is one range scan, no
+        matter how deep it is.
+        """
+        cursor = aliased(Campaign, name="cursor")
+        cursor_created_at = (
+            select(cursor.created_at)
+            .where(and_(cursor.id == after_id, cursor.company_id == company_id))
+            .scalar_subquery()
+        )
+        return tuple_(Campaign.created_at, Campaign.id) < tuple_(cursor_created_at, after_id)
 
     async def list_campaigns(
         self, 
         company_id: int, 
         page: int = 1, 
         page_size: int = 10,
-        filters: Optional[CampaignFilter] = None
-    ) -> tuple[List[Campaign], int]:
+        filters: Optional[CampaignFilter] = None,
+        with_total: bool = True,
+        after_id: Optional[int] = None
+    ) -> tuple[List[Campaign], Optional[int], Optional[int]]:
         """
         List campaigns with pagination and filtering.
+        
+        Returns (campaigns, total, next_cursor). total is None when
+        with_total is False. Passing after_id switches to keyset
+        pagination: the page starts after that campaign (0 for the first
+        page), and next_cursor is set when more follow.
         """
         try:
             # Base query
-            query = select(Campaign).where(Campaign.company_id == company_id)
-            count_query = select(func.count()).select_from(Campaign).where(Campaign.company_id == company_id)
-            
-            # Apply filters
-            if filters:
-                if filters.search:
-                    search_term = f"%{filters.search}%"
-                    query = query.where(Campaign.name.ilike(search_term))
-                    count_query = count_query.where(Campaign.name.ilike(search_term))
-                
-                if filters.status:
-                    query = query.where(Campaign.status == filters.status)
-                    count_query = count_query.where(Campaign.status == filters.status)
-                
-                if filters.is_active is not None:
-                    query = query.where(Campaign.is_active == filters.is_active)
-                    count_query = count_query.where(Campaign.is_active == filters.is_active)
-                
-                if filters.created_after:
-                    query = query.where(Campaign.created_at >= filters.created_after)
-                    count_query = count_query.where(Campaign.created_at >= filters.created_after)
-                
-                if filters.created_before:
-                    query = query.where(Campaign.created_at <= filters.created_before)
-                    count_query = count_query.where(Campaign.created_at <= filters.created_before)
+            query = self._apply_filters(select(Campaign), company_id, filters)
+            count_query = self._apply_filters(
+                select(func.count()).select_from(Campaign), company_id, filters
+            )
+            
+            # Add ordering and pagination (newest first; id breaks ties so
+            # the order is stable)
+            query = query.order_by(Campaign.created_at.desc(), Campaign.id.desc())
+            if after_id is not None:
+                if after_id:
+                    query = query.where(self._after_cursor(company_id, after_id))
+                # Fetch one extra row to learn whether another page exists
+                query = query.limit(page_size + 1)
+            else:
+                query = query.offset((page - 1) * page_size).limit(page_size)
+            
+            # Offset pages get the total from a window function computed
+            # in the same scan as the page (COUNT(*) OVER () is evaluated
+            # before OFFSET/LIMIT, so it counts every matching campaign).
+            # Keyset pages can't: their cursor condition would leave
+            # earlier campaigns out of the count.
+            window_total = with_total and after_id is None
+            if window_total:
+                query = query.add_columns(func.count().over().label("total_count"))
             
-            # Add ordering and pagination
-            query = query.order_by(Campaign.created_at.desc())
-            query = query.offset((page - 1) * page_size).limit(page_size)
+            # The page becomes a CTE, and each of its campaigns is returned
+            # alongside its email counts (total, sent, failed) from one
+            # GROUP BY restricted to the page's ids - so campaigns and
+            # counts come back in a single round trip
+            page_cte = query.cte("page")
+            page_campaign = aliased(Campaign, page_cte)
+            email_counts = (
+                select(
+                    CampaignEmail.campaign_id,
+                    func.count().label("total"),
+                    func.count().filter(CampaignEmail.status == CampaignEmailStatus.SENT).label("sent"),
+                    func.count().filter(CampaignEmail.status == CampaignEmailStatus.FAILED).label("failed")
+                )
+                .where(CampaignEmail.campaign_id.in_(select(page_cte.c.id)))
+                .group_by(CampaignEmail.campaign_id)
+                .subquery()
+            )
+            page_query = (
+                select(
+                    page_campaign,
+                    email_counts.c.total,
+                    email_counts.c.sent,
+                    email_counts.c.failed,
+                    page_cte.c.total_count if window_total else null()
+                )
+                .outerjoin(email_counts, email_counts.c.campaign_id == page_campaign.id)
+                .order_by(page_campaign.created_at.desc(), page_campaign.id.desc())
+                # Responses only use campaign columns; a relationship
+                # access raises rather than lazy-loading per campaign
+                .options(raiseload("*"))
+            )
             
             # Execute queries
-            campaigns_result = await self.db.execute(query)
-            campaigns = campaigns_result.scalars().all()
+            rows = (await self.db.execute(page_query)).all()
+            
+            next_cursor = None
+            if after_id is not None and len(rows) > page_size:
+                rows = rows[:page_size]
+                next_cursor = rows[-1][0].id
             
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
+            total = None
+            if window_total and rows:
+                total = rows[0][-1]
+            elif window_total and page == 1:
+                total = 0  # Not even a first page: nothing matches
+            elif with_total:
+                # Keyset page, or an offset past the last campaign (no row
+                # to read the window total from)
+                # A single integer: run it on the session's connection
+                # (same transaction), skipping the ORM execution layer
+                conn = await self.db.connection()
+                count_result = await conn.execute(count_query)
+                total = count_result.scalar()
             
             # Add computed fields for each campaign
-            for campaign in campaigns:
-                campaign.context = CampaignContext(**campaign.context_json)
-                campaign.delays = CampaignDelays(delays=campaign.delays_json)
-                
-                # Get email counts
-                email_count_query = select(func.count()).select_from(CampaignEmail).where(
-                    CampaignEmail.campaign_id == campaign.id
-                )
-                email_count_result = await self.db.execute(email_count_query)
-                campaign.email_count = email_count_result.scalar() or 0
-                
-                sent_count_query = select(func.count()).select_from(CampaignEmail).where(
-                    and_(
-                        CampaignEmail.campaign_id == campaign.id,
-                        CampaignEmail.status == CampaignEmailStatus.SENT
-                    )
+            # (stored context and delays were validated when written, so
+            # they're wrapped without running the validators again)
+            campaigns = []
+            for campaign, email_total, sent, failed, _ in rows:
+                campaign.context = CampaignContext.model_construct(**campaign.context_json)
+                campaign.delays = CampaignDelays.model_construct(delays=campaign.delays_json)
+                campaign.email_count = email_total or 0
+                campaign.sent_count = sent or 0
+                campaign.failed_count = failed or 0
+                campaigns.append(campaign)
+            
+            return campaigns, total, next_cursor
+            
+        except Exception as e:
+            logger.error(f"Error listing campaigns: {str(e)}")
+            raise
+
+    async def list_campaigns_json(
+        self, 
+        company_id: int, 
+        page: int = 1, 
+        page_size: int = 10,
+        filters: Optional[CampaignFilter] = None,
+        with_total: bool = True,
+        after_id: Optional[int] = None
+    ) -> Optional[bytes]:
+        """
+        List campaigns as a ready-to-send CampaignListResponse JSON body.
+        
+        PostgreSQL builds the whole response (campaigns, counts, total and
+        cursor) in one statement with json_build_object/json_agg, so the
+        list endpoint skips loading ORM objects and running 100 Pydantic
+        validations just to turn them back into JSON.
+        
+        Returns None on other databases (e.g. the SQLite dev database);
+        callers should fall back to list_campaigns().
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return None
+        
+        try:
+            # Step 1: The page of campaigns, numbered in display order
+            order_by = (Campaign.created_at.desc(), Campaign.id.desc())
+            
+            page_query = self._apply_filters(
+                select(
+                    Campaign.id,
+                    Campaign.name,
+                    Campaign.context_json,
+                    Campaign.delays_json,
+                    Campaign.status,
+                    Campaign.max_sequence_length,
+                    Campaign.is_active,
+                    Campaign.scheduled_start,
+                    Campaign.created_at,
+                    Campaign.updated_at,
+                    func.row_number().over(order_by=order_by).label("position")
+                ),
+                company_id,
+                filters
+            )
+            page_query = page_query.order_by(*order_by)
+            if after_id is not None:
+                if after_id:
+                    page_query = page_query.where(self._after_cursor(company_id, after_id))
+                # One extra row tells us whether another page exists
+                page_query = page_query.limit(page_size + 1)
+            else:
+                page_query = page_query.offset((page - 1) * page_size).limit(page_size)
+            page_rows = page_query.subquery("page")
+            
+            # Step 2: Email counts for each campaign on the page (LATERAL,
+            # so it only touches those campaigns' emails)
+            email_counts = (
+                select(
+                    func.count().label("total"),
+                    func.count().filter(CampaignEmail.status == CampaignEmailStatus.SENT).label("sent"),
+                    func.count().filter(CampaignEmail.status == CampaignEmailStatus.FAILED).label("failed")
                 )
-                sent_count_result = await self.db.execute(sent_count_query)
-                campaign.sent_count = sent_count_result.scalar() or 0
-                
-                failed_count_query = select(func.count()).select_from(CampaignEmail).where(
-                    and_(
-                        CampaignEmail.campaign_id == campaign.id,
-                        CampaignEmail.status == CampaignEmailStatus.FAILED
-                    )
+                .where(CampaignEmail.campaign_id == page_rows.c.id)
+                .lateral("email_counts")
+            )
+            
+            # Step 3: One JSON object per campaign, keys in CampaignResponse
+            # order. Statuses are stored by enum name ("DRAFT"); the API
+            # returns the value ("draft").
+            campaign_json = func.json_build_object(
+                "name", page_rows.c.name,
+                "id", page_rows.c.id,
+                "context", page_rows.c.context_json,
+                "delays", func.json_build_object("delays", page_rows.c.delays_json),
+                "status", func.lower(type_coerce(page_rows.c.status, String)),
+                "max_sequence_length", page_rows.c.max_sequence_length,
+                "is_active", page_rows.c.is_active,
+                "scheduled_start", page_rows.c.scheduled_start,
+                "created_at", page_rows.c.created_at,
+                "updated_at", page_rows.c.updated_at,
+                "email_count", email_counts.c.total,
+                "sent_count", email_counts.c.sent,
+                "failed_count", email_counts.c.failed
+            )
+            campaigns_json = func.json_agg(aggregate_order_by(campaign_json, page_rows.c.position))
+            
+            # Step 4: Wrap the page in the list envelope
+            if with_total:
+                total = self._apply_filters(
+                    select(func.count()).select_from(Campaign), company_id, filters
+                ).scalar_subquery()
+                total_pages = (total + page_size - 1) // page_size  # Ceiling division
+            else:
+                total = total_pages = null()
+            
+            if after_id is not None:
+                # Leave the extra lookahead row out of the page
+                on_page = page_rows.c.position <= page_size
+                campaigns_json = campaigns_json.filter(on_page)
+                # The cursor is the page's last campaign
+                next_cursor = case(
+                    (func.count() > page_size, func.max(page_rows.c.id).filter(page_rows.c.position == page_size)),
+                    else_=null()
                 )
-                failed_count_result = await self.db.execute(failed_count_query)
-                campaign.failed_count = failed_count_result.scalar() or 0
+            else:
+                next_cursor = null()
             
-            return campaigns, total
+            envelope = func.json_build_object(
+                "campaigns", func.coalesce(campaigns_json, literal_column("'[]'::json")),
+                "total", total,
+                "page", page,
+                "page_size", page_size,
+                "total_pages", total_pages,
+                "next_cursor", next_cursor
+            )
+            
+            # Cast to text so the driver hands back the JSON as-is
+            query = (
+                select(cast(envelope, Text))
+                .select_from(page_rows)
+                .join(email_counts, true())
+            )
+            result = await self.db.execute(query)
+            return result.scalar_one().encode()
             
         except Exception as e:
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error listing campaigns: {str(e)}")
+            logger.error(f"Error listing campaigns as JSON: {str(e)}")
             raise
 
     async def get_campaign(self, campaign_id: int, company_id: int) -> Optional[Campaign]:
@@ -290,53 +962,111 @@ class CampaignService:
         Get a specific campaign by ID.
         """
         try:
-            query = select(Campaign).where(
-                and_(
-                    Campaign.id == campaign_id,
-                    Campaign.company_id == company_id
-                )
+            # Statement built once at import (see _build_campaign_with_counts)
+            result = await self.db.execute(
+                _CAMPAIGN_WITH_COUNTS, {"campaign_id": campaign_id, "company_id": company_id}
             )
+            row = result.one_or_none()
+            if row is None:
+                return None
             
-            result = await self.db.execute(query)
-            campaign = result.scalar_one_or_none()
+            campaign, total, sent, failed = row
             
-            if campaign:
-                # Add computed fields
-                campaign.context = CampaignContext(**campaign.context_json)
-                campaign.delays = CampaignDelays(delays=campaign.delays_json)
-                
-                # Get email counts
-                email_count_query = select(func.count()).select_from(CampaignEmail).where(
-                    CampaignEmail.campaign_id == campaign.id
-                )
-                email_count_result = await self.db.execute(email_count_query)
-                campaign.email_count = email_count_result.scalar() or 0
-                
-                sent_count_query = select(func.count()).select_from(CampaignEmail).where(
-                    and_(
-                        CampaignEmail.campaign_id == campaign.id,
-                        CampaignEmail.status == CampaignEmailStatus.SENT
-                    )
-                )
-                sent_count_result = await self.db.execute(sent_count_query)
-                campaign.sent_count = sent_count_result.scalar() or 0
-                
-                failed_count_query = select(func.count()).select_from(CampaignEmail).where(
-                    and_(
-                        CampaignEmail.campaign_id == campaign.id,
-                        CampaignEmail.status == CampaignEmailStatus.FAILED
-                    )
-                )
-                failed_count_result = await self.db.execute(failed_count_query)
-                campaign.failed_count = failed_count_result.scalar() or 0
+            # Add computed fields (stored JSON was validated when written)
+            campaign.context = CampaignContext.model_construct(**campaign.context_json)
+            campaign.delays = CampaignDelays.model_construct(delays=campaign.delays_json)
+            campaign.email_count = total or 0
+            campaign.sent_count = sent or 0
+            campaign.failed_count = failed or 0
             
             return campaign
             
         except Exception as e:
-            logger = logging.getLogger(__name__)
             logger.error(f"Error getting campaign: {str(e)}")
             raise
 
+    @classmethod
+    def _invalidate_lists(cls, company_id: int) -> None:
+        """Make every cached list page of this company stale (after a campaign write)."""
+        cls._list_versions[company_id] = cls._list_versions.get(company_id, 0) + 1
+
+    async def list_campaigns_body(
+        self, 
+        company_id: int, 
+        page: int = 1, 
+        page_size: int = 10,
+        filters: Optional[CampaignFilter] = None,
+        with_total: bool = True,
+        after_id: Optional[int] = None
+    ) -> bytes:
+        """
+        Get a page of campaigns as a CampaignListResponse JSON body,
+        served from a short-lived cache.
+        """
+        key = (
+            company_id,
+            self._list_versions.get(company_id, 0),
+            page,
+            page_size,
+            tuple(filters.model_dump().values()) if filters else None,
+            with_total,
+            after_id
+        )
+        cached = self._list_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # On PostgreSQL the database returns the finished JSON body
+        body = await self.list_campaigns_json(
+            company_id=company_id,
+            page=page,
+            page_size=page_size,
+            filters=filters,
+            with_total=with_total,
+            after_id=after_id
+        )
+        if body is None:
+            campaigns, total, next_cursor = await self.list_campaigns(
+                company_id=company_id,
+                page=page,
+                page_size=page_size,
+                filters=filters,
+                with_total=with_total,
+                after_id=after_id
+            )
+            
+            total_pages = -(-total // page_size) if total is not None else None  # Ceiling division
+            
+            # Build the envelope without validation and serialize it here
+            body = CampaignListResponse.model_construct(
+                campaigns=_CAMPAIGN_LIST_ADAPTER.validate_python(campaigns, from_attributes=True),
+                total=total,
+                page=page,
+                page_size=page_size,
+                total_pages=total_pages,
+                next_cursor=next_cursor
+            ).model_dump_json().encode()
+
+        self._list_cache.set(key, body)
+        return body
+
+    async def get_campaign_response(self, campaign_id: int, company_id: int) -> Optional[CampaignResponse]:
+        """
+        Get a campaign as an API response, served from a short-lived cache.
+        """
+        key = (company_id, campaign_id)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            return cached
+
+        campaign = await self.get_campaign(campaign_id, company_id)
+        if not campaign:
+            return None
+
+        response = CampaignResponse.model_validate(campaign)
+        self._response_cache.set(key, response)
+        return response
+
     async def update_campaign(
         self, 
         campaign_id: int, 
@@ -361,7 +1091,7 @@ class CampaignService:
                 campaign.name = update_data.name
             
             if update_data.context is not None:
-                campaign.context_json = update_data.context.dict()
+                campaign.context_json = update_data.context.model_dump()
             
             if update_data.delays is not None:
                 campaign.delays_json = update_data.delays.delays
@@ -375,19 +1105,21 @@ class CampaignService:
             if update_data.is_active is not None:
                 campaign.is_active = update_data.is_active
             
-            campaign.updated_at = datetime.utcnow()
+            campaign.updated_at = utcnow()
             
             await self.db.commit()
             await self.db.refresh(campaign)
+            self._response_cache.pop((company_id, campaign_id))
+            self._invalidate_lists(company_id)
             
-            # Add computed fields for response
-            campaign.context = CampaignContext(**campaign.context_json)
-            campaign.delays = CampaignDelays(delays=campaign.delays_json)
+            # Add computed fields for response, reusing the request's
+            # already-validated models for whatever was just updated
+            campaign.context = update_data.context or CampaignContext.model_construct(**campaign.context_json)
+            campaign.delays = update_data.delays or CampaignDelays.model_construct(delays=campaign.delays_json)
             
             return campaign
             
         except Exception as e:
-            logger = logging.getLogger(__name__)
             logger.error(f"Error updating campaign: {str(e)}")
             raise
 
@@ -396,28 +1128,62 @@ class CampaignService:
         Delete a campaign (soft delete).
         """
         try:
-            query = select(Campaign).where(
-                and_(
-                    Campaign.id == campaign_id,
-                    Campaign.company_id == company_id
+            # One UPDATE ... RETURNING instead of loading the campaign and
+            # flushing it back; updated_at is set by the column's onupdate.
+            # Deleting an already inactive campaign still succeeds.
+            query = (
+                update(Campaign)
+                .where(
+                    and_(
+                        Campaign.id == campaign_id,
+                        Campaign.company_id == company_id
+                    )
                 )
+                .values(is_active=False)
+                .returning(Campaign.id)
             )
             
             result = await self.db.execute(query)
-            campaign = result.scalar_one_or_none()
-            
-            if not campaign:
+            if result.first() is None:
                 return False
             
-            # Soft delete
-            campaign.is_active = False
-            campaign.updated_at = datetime.utcnow()
-            
             await self.db.commit()
+            self._response_cache.pop((company_id, campaign_id))
+            self._invalidate_lists(company_id)
             return True
             
         except Exception as e:
-            logger = logging.getLogger(__name__)
             logger.error(f"Error deleting campaign: {str(e)}")
             raise
 
+async def generate_campaign_emails(campaign_id: int, company_id: int, context: CampaignContext) -> None:
+    """
+    Background task: generate a new campaign's PENDING emails.
+    
+    Runs after the create response has been sent, when the request's
+    session is already closed, so it opens a session of its own. Errors
+    are logged by _batch_generate_emails and the emails stay PENDING.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            await CampaignService(db)._batch_generate_emails(campaign_id, company_id, context)
+        except Exception:
+            logger.error(f"Email generation failed for campaign {campaign_id}")
+
+async def poll_generation_batches() -> None:
+    """
+    Background loop: collect finished OpenAI batch jobs.
+    
+    Started by the app lifespan and cancelled on shutdown. Every
+    openai_batch_poll_seconds it stores the results of any batch job
+    that has finished (see CampaignService.collect_generation_batches).
+    Errors are logged and retried on the next round.
+    """
+    interval = get_integration_settings().openai_batch_poll_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await CampaignService(db).collect_generation_batches()
+        except Exception:
+            logger.error("Collecting OpenAI batch results failed; retrying next round")
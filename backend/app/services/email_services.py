@@ -7,20 +7,79 @@ using AI. It will be the core of your agent functionality.
 """
 
 import openai
-from typing import Optional, Dict, Any
+import httpx
+import orjson
+from typing import Optional, Dict, Any, List, Tuple, Union
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.lead import Lead
-from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.config import get_integration_settings
 
-from datetime import datetime
-import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+import hashlib
 
 from app.schemas.campaign import CampaignContext, CampaignDelays
 
 logger = logging.getLogger(__name__)
 
+# Model settings for generated emails
+EMAIL_MODEL = "gpt-4o-mini"
+EMAIL_TEMPERATURE = 0.7
+
+# Instructions shared by every email. They go first, in the system message,
+# so every request starts with the same tokens: OpenAI caches repeated
+# prompt prefixes automatically and bills cached tokens at a discount.
+# Only the lead details (the user message) differ between requests.
+STATIC_INSTRUCTIONS = """You are an expert sales email writer.
+
+Write a personalized sales email for the lead described in the user message.
+
+Email Requirements:
+- Keep it under 150 words
+- Professional but friendly tone
+- Mention their specific role and company
+- Include a clear call-to-action
+- Format: a JSON object with "subject" and "body" string keys"""
+
+# Max tokens generated per email
+EMAIL_MAX_TOKENS = 500
+
+# OpenAI batch job statuses after which nothing more will change
+BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+@dataclass(frozen=True, slots=True)
+class LeadPromptView:
+    """
+    The lead fields an email prompt uses, without a full ORM Lead.
+    
+    Campaign generation loads thousands of leads just to build prompts;
+    plain column rows wrapped in this are much cheaper than ORM objects
+    (no identity map, no attribute instrumentation, no unloaded columns).
+    generate_email accepts either this or a Lead.
+    """
+    id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    company_name: Optional[str]
+    email: str
+    phone: Optional[str]
+    linkedin_url: Optional[str]
+
+    @property
+    def full_name(self) -> str:
+        """Same as Lead.full_name."""
+        return " ".join(filter(None, (self.first_name, self.last_name)))
+
+# The columns LeadPromptView is built from, in field order
+LEAD_PROMPT_COLUMNS = (
+    Lead.id, Lead.first_name, Lead.last_name, Lead.company_name,
+    Lead.email, Lead.phone, Lead.linkedin_url,
+)
+
 class EmailService:
     """
     Service for generating personalized emails using OpenAI.
@@ -29,50 +88,104 @@ class EmailService:
     
     def __init__(self):
         
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+        settings = get_integration_settings()
+        
+        # Native async client: requests run on the event loop instead of
+        # tying up a worker thread each (asyncio.to_thread), so the number of
+        # in-flight generations is no longer capped by the thread pool.
+        # Its httpx connection pool is shared by every request; keep enough
+        # idle connections around for one campaign's worth of concurrent
+        # requests (openai_max_concurrency) so they reuse warm TLS connections.
+        # Transient failures (rate limits, 5xx, connection errors and
+        # timeouts) are retried by the SDK itself, with exponential backoff
+        # plus jitter that honors OpenAI's Retry-After header, so a burst
+        # against the rate limit doesn't turn into FAILED emails. Bad
+        # requests (400) aren't retried and fail right away.
+        self.client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            max_retries=settings.openai_max_retries,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=settings.openai_max_concurrency
+                )
+            )
+        )
+        
+        # Generated emails by prompt (see _cache_key), used only by campaign
+        # generation (use_cache=True). Reruns of a failed campaign, or a lead
+        # added to several campaigns with the same context, produce the exact
+        # same prompt; a hit skips the OpenAI round-trip entirely. Short TTL
+        # so a later campaign still gets fresh emails. Per worker; Redis
+        # would share it across workers.
+        self._email_cache: TTLCache[Dict[str, Any]] = TTLCache(maxsize=10_000, ttl=3600)
+        
+        # Last (campaign context, system prompt) built; see _generate_system_prompt
+        self._last_system_prompt: Optional[Tuple[CampaignContext, str]] = None
+    
+    async def close(self) -> None:
+        """Close the shared HTTP connection pool (called on app shutdown)."""
+        await self.client.close()
 
-    async def generate_email(self, lead: Lead, campaign_context: Optional[CampaignContext] = None) -> Dict[str, Any]:
+    async def generate_email(self, lead: Union[Lead, LeadPromptView], campaign_context: Optional[CampaignContext] = None, use_cache: bool = False) -> Dict[str, Any]:
         """
         Generate a personalized email for a lead.
 
         Args:
-            lead: Lead object containing lead data
+            lead: Lead (or LeadPromptView) containing lead data
+            use_cache: Reuse (and store) an email generated from the same
+                prompt within the last hour. Off by default, so asking for
+                an email again writes a new one.
 
         Returns:
             Dict containing email subject, body, and other details
         """
 
         try:
-            #Build the prompt with the lead data
-            prompt = self._generate_email_prompt(lead, campaign_context)
+            #Build the prompt: shared instructions + campaign context, then the lead data
+            system_prompt = self._generate_system_prompt(campaign_context)
+            prompt = self._generate_email_prompt(lead)
+
+            # Reuse an email already generated from this exact prompt
+            cache_key = None
+            if use_cache:
+                cache_key = self._cache_key(system_prompt, prompt)
+                cached = self._email_cache.get(cache_key)
+                if cached is not None:
+                    now = datetime.now(timezone.utc)
+                    return {
+                        **cached,
+                        "lead_id": lead.id,
+                        "created_at": now,
+                        "updated_at": now,
+                        "tokens_used": 0,  # No API call was made
+                    }
 
             #Call the OpenAI API
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert sales email writer."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
+            response = await self.client.chat.completions.create(
+                **self._chat_request(system_prompt, prompt)
             )
 
             #Parse the response
-            email_content = response.choices[0].message.content
+            subject, body = self._split_email(response.choices[0].message.content)
 
-            # Split into subject and body (we'll improve this)
-            lines = email_content.strip().split('\n')
-            subject = lines[0].replace("Subject: ", "")
-            body = '\n'.join(lines[1:]).strip()
+            if cache_key is not None:
+                self._email_cache.set(cache_key, {
+                    "subject": subject,
+                    "body": body,
+                    "model_used": EMAIL_MODEL,
+                })
 
+            # The campaign pipeline only reads subject and body; the rest is
+            # for the single-lead endpoint, which returns this dict as is
+            now = datetime.now(timezone.utc)
             return {
                 "subject": subject,
                 "body": body,
                 "lead_id": lead.id,
-                "created_at": datetime.now(),
-                "updated_at": datetime.now(),
-                "model_used": "gpt-4o",
+                "created_at": now,
+                "updated_at": now,
+                "model_used": EMAIL_MODEL,
                 "tokens_used": response.usage.total_tokens,
             }
         
@@ -81,45 +194,180 @@ class EmailService:
             raise e
     
 
-    def _generate_email_prompt(self, lead: Lead, context: Optional[CampaignContext] = None) -> str:
+    def build_batch_request(self, custom_id: str, lead: Union[Lead, LeadPromptView], campaign_context: Optional[CampaignContext] = None) -> Dict[str, Any]:
+        """
+        Build one line of an OpenAI Batch API input file for a lead.
+        
+        Same request generate_email would send; custom_id comes back with
+        the result so it can be matched to its email.
+        """
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": self._chat_request(
+                self._generate_system_prompt(campaign_context),
+                self._generate_email_prompt(lead)
+            ),
+        }
+
+    async def submit_batch(self, requests: List[Dict[str, Any]]) -> str:
+        """
+        Submit requests built by build_batch_request as one OpenAI batch job.
+        
+        The job runs asynchronously on OpenAI's side (within 24 hours, at
+        half the price of live calls); poll it with get_batch_results.
+        Returns the batch id.
+        """
+        # JSONL: one request per line
+        jsonl = b"\n".join(orjson.dumps(request) for request in requests)
+        
+        input_file = await self.client.files.create(
+            file=("campaign_emails.jsonl", jsonl),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id} with {len(requests)} requests")
+        return batch.id
+
+    async def get_batch_results(self, batch_id: str) -> Optional[Tuple[str, Dict[str, Union[Dict[str, str], str]]]]:
         """
-        Generate a prompt for the email generation model.
+        Fetch the results of a batch job, once it has finished.
+        
+        Returns None while the job is still running. Otherwise returns the
+        job's final status and a dict mapping each custom_id to either
+        {"subject": ..., "body": ...} or an error message. Requests the job
+        never got to (an expired or cancelled job) are missing from the dict.
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status not in BATCH_TERMINAL_STATUSES:
+            return None
+        
+        results: Dict[str, Union[Dict[str, str], str]] = {}
+        
+        # Successful requests are in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line:
+                    continue
+                item = orjson.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    subject, body = self._split_email(
+                        response["body"]["choices"][0]["message"]["content"]
+                    )
+                    results[item["custom_id"]] = {"subject": subject, "body": body}
+                else:
+                    error = item.get("error") or (response.get("body") or {}).get("error") or {}
+                    results[item["custom_id"]] = error.get("message") or f"OpenAI batch request failed ({response.get('status_code')})"
+        
+        return batch.status, results
+
+    @staticmethod
+    def _chat_request(system_prompt: str, prompt: str) -> Dict[str, Any]:
+        """Chat completion parameters for one email (live call or batch line)."""
+        return {
+            "model": EMAIL_MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": EMAIL_TEMPERATURE,
+            "max_tokens": EMAIL_MAX_TOKENS,
+            # JSON mode: the reply is always one valid JSON object
+            "response_format": {"type": "json_object"},
+        }
+
+    @staticmethod
+    def _split_email(email_content: str) -> Tuple[str, str]:
+        """Split generated text into (subject, body)."""
+        # Normally a JSON object (JSON mode, see _chat_request)
+        try:
+            email = orjson.loads(email_content)
+            if isinstance(email, dict):
+                return str(email.get("subject") or "").strip(), str(email.get("body") or "").strip()
+        except orjson.JSONDecodeError:
+            pass
+        
+        # Otherwise plain text: subject line first, then the body.
+        # partition splits off the first line without building a list of
+        # every line and joining the rest back together.
+        first, _, rest = email_content.strip().partition('\n')
+        return first.removeprefix("Subject: ").strip(), rest.strip()
+
+    @staticmethod
+    def _cache_key(system_prompt: str, prompt: str) -> str:
         """
+        Cache key for a generated email.
+        
+        The two prompts already contain everything about the lead and
+        campaign context that shapes the email; the model and temperature
+        are added so changing either one doesn't serve emails made with the
+        old ones.
+        """
+        return hashlib.sha256(
+            f"{EMAIL_MODEL}|{EMAIL_TEMPERATURE}|{system_prompt}|{prompt}".encode()
+        ).hexdigest()
 
-        if context:
-            context_section = f"""
-            Campaign Context:
-            - Company: {context.company_name}
-            - Product: {context.product_description}
-            - Problem Solved: {context.problem_solved}
-            - Call to Action: {context.call_to_action}
-            - Tone: {context.tone}
-            """
-        else:
-            context_section = ""
-        
-        
-        prompt = f"""
-            Generate a personalized email for this lead:"
-            Name: {lead.full_name}
-            Company: {lead.company_name}
-            Email: {lead.email}
-            Phone: {lead.phone}
-            LinkedIn: {lead.linkedin_url}
-
-                    Email Requirements:
-            - Keep it under 150 words
-            - Professional but friendly tone
-            - Mention their specific role and company
-            - Include a clear call-to-action
-            - Format: Subject line first, then email body
-
-            If provided, use the following campaign context to guide the email writing:
-            {context_section}
-
-            Write the email now
+    def _generate_system_prompt(self, context: Optional[CampaignContext] = None) -> str:
+        """
+        Generate the system message: the shared instructions, then the campaign context.
+        
+        Identical for every lead in a campaign, so the whole message is a
+        reusable prompt prefix.
         """
-        return prompt
+
+        if not context:
+            return STATIC_INSTRUCTIONS
+        
+        # A campaign passes the same context object for every one of its
+        # leads; build its system prompt once, not once per lead
+        last = self._last_system_prompt
+        if last is not None and last[0] is context:
+            return last[1]
+        
+        system_prompt = f"""{STATIC_INSTRUCTIONS}
+
+Use the following campaign context to guide the email writing:
+Campaign Context:
+- Company: {context.company_name}
+- Product: {context.product_description}
+- Problem Solved: {context.problem_solved}
+- Call to Action: {context.call_to_action}
+- Tone: {context.tone}"""
+        self._last_system_prompt = (context, system_prompt)
+        return system_prompt
+
+    def _generate_email_prompt(self, lead: Union[Lead, LeadPromptView]) -> str:
+        """
+        Generate the user message: just this lead's details.
+        """
+
+        return f"""Generate a personalized email for this lead:
+Name: {lead.full_name}
+Company: {lead.company_name}
+Email: {lead.email}
+Phone: {lead.phone}
+LinkedIn: {lead.linkedin_url}
+
+Write the email now"""
+
+@lru_cache(maxsize=None)
+def get_email_service() -> EmailService:
+    """
+    Return the process-wide EmailService.
+    
+    The OpenAI client holds an HTTP connection pool, so it is built once
+    and shared instead of being recreated for every request.
+    """
+    return EmailService()
 
 if __name__ == "__main__":
     pass
\ No newline at end of file
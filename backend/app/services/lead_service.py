@@ -7,21 +7,92 @@ Why use a service layer?
 - Reusable business logic (can be called from different endpoints)
 - Easier testing (mock the service, not the database)
 - Clear separation of concerns
+
+Loading relationships: get_lead and list_leads load Lead.research (the
+response needs it) and make every other relationship raise if touched,
+instead of quietly running one SELECT per lead while a page is
+serialized. A caller that needs another relationship asks for it
+explicitly, e.g. get_lead(..., load_options=(selectinload(Lead.company),)).
+New relationships on Lead get the same treatment by default.
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import selectinload
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from sqlalchemy import select, insert, and_, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import noload, raiseload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
+from typing import Optional, List, Dict, Any, Sequence
+from functools import lru_cache
 import logging
+import re
 
 from app.models.lead import Lead
-from app.schemas.lead import LeadCreate, LeadUpdate, LeadFilter
-from app.core.database import get_db
+from app.schemas.lead import LeadCreate, LeadUpdate, LeadFilter, LeadResponse
+from app.core.database import get_db, utcnow
+from app.core.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Lead scoring lookups, built once instead of on every _calculate_lead_score
+# call (it runs once per row on bulk imports).
+# Plain substring match, like the `keyword in title` checks it replaces:
+# "SVP" and "General Manager" count as senior.
+_SENIOR_TITLE_RE = re.compile(r"director|manager|head|vp|ceo|cto|cfo", re.IGNORECASE)
+_FREE_EMAIL_DOMAINS = frozenset({"gmail.com", "yahoo.com", "hotmail.com", "outlook.com"})
+_HIGH_QUALITY_SOURCES = frozenset({"linkedin", "referral", "event"})
+
+def _lead_load_options(extra: Sequence[ORMOption] = ()) -> tuple:
+    """Loader options for Lead queries: research, whatever the caller asked for, nothing else."""
+    return (selectinload(Lead.research), *extra, raiseload("*"))
+
+@lru_cache(maxsize=8192)
+def _lead_score(
+    has_company_name: bool,
+    job_title: Optional[str],
+    has_phone: bool,
+    email_domain: Optional[str],
+    source: Optional[str]
+) -> int:
+    """
+    The score for a lead with these attributes (see LeadService._calculate_lead_score).
+    
+    Cached: imported leads often share a job title, domain and source (a
+    batch of people from one company), so repeats skip the title regex.
+    The arguments are exactly what the score depends on, no more.
+    """
+    
+    score = 0
+    
+    # Company name available
+    if has_company_name:
+        score += 20
+    
+    # Job title available
+    if job_title:
+        score += 15
+        
+        # Senior position bonus
+        if _SENIOR_TITLE_RE.search(job_title):
+            score += 20
+    
+    # Phone number available
+    if has_phone:
+        score += 10
+    
+    # Email domain quality (basic heuristic)
+    if email_domain is not None:
+        # Avoid free email providers
+        if email_domain not in _FREE_EMAIL_DOMAINS:
+            score += 10
+    
+    # Source quality
+    if source in _HIGH_QUALITY_SOURCES:
+        score += 10
+    
+    # Cap at 100
+    return min(score, 100)
+
 class LeadService:
     """
     Service class for lead operations.
@@ -33,6 +104,11 @@ class LeadService:
     - Search and filtering
     """
     
+    # Serialized GET-by-id results shared across requests, keyed by
+    # (company_id, lead_id). Writes invalidate their key; the short TTL
+    # bounds staleness on other workers.
+    _response_cache: TTLCache[LeadResponse] = TTLCache(maxsize=4096, ttl=10)
+    
     def __init__(self, db: AsyncSession):
         self.db = db
     
@@ -60,52 +136,166 @@ class LeadService:
         try:
             logger.info(f"Creating lead for company {company_id}, email: {lead_data.email}")
             
-            # Check for duplicate leads (same email within company)
-            existing_lead = await self._find_duplicate_lead(
-                email=lead_data.email,
-                company_id=company_id
+            # Insert first and let the unique (company_id, email) index
+            # catch duplicates: a new lead is one INSERT ... ON CONFLICT DO
+            # NOTHING RETURNING round trip, with no SELECT before it (and no
+            # gap between a SELECT and the INSERT for a concurrent request
+            # to slip into)
+            db_lead = await self.db.scalar(
+                self._insert_leads_ignoring_duplicates()
+                .values(self._new_lead_row(lead_data, company_id, created_by))
+                .returning(Lead)
+                # A brand-new lead has no research; skip the selectin query
+                .options(noload(Lead.research))
             )
             
-            if existing_lead:
-                if existing_lead.is_deleted:
-                    # Reactivate soft-deleted lead instead of creating new one
-                    return await self._reactivate_lead(existing_lead, lead_data)
-                else:
+            if db_lead is None:
+                # Nothing inserted: the email is taken, possibly by a
+                # soft-deleted lead
+                existing_lead = await self._find_duplicate_lead(
+                    email=lead_data.email,
+                    company_id=company_id
+                )
+                if existing_lead is None or not existing_lead.is_deleted:
                     raise ValueError(f"Lead with email {lead_data.email} already exists")
+                
+                # Reactivate soft-deleted lead instead of creating new one
+                lead = await self._reactivate_lead(existing_lead, lead_data)
+                await self.db.commit()
+                return lead
             
-            # Create new lead
-            db_lead = Lead(
-                company_id=company_id,
-                created_by=created_by,
-                **lead_data.model_dump()
-            )
-            
-            # Apply initial lead scoring
-            db_lead = await self._calculate_lead_score(db_lead)
-            
-            # Set initial status based on score
-            db_lead.status = "qualified" if db_lead.score >= 50 else "new"
-            
-            self.db.add(db_lead)
-            await self.db.flush()  # Get the ID without committing
-            await self.db.refresh(db_lead)
+            await self.db.commit()
             
             logger.info(f"Created lead {db_lead.id} for company {company_id}")
             return db_lead
             
+        except ValueError as e:
+            # Expected (duplicate email); the endpoint answers 400, so no
+            # traceback at ERROR level
+            logger.info(f"Lead not created for company {company_id}: {e}")
+            raise
         except Exception as e:
-            logger.error(f"Error creating lead: {str(e)}")
-            logger.error(f"Error type: {type(e)}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception(f"Error creating lead: {str(e)}")
             raise
     
-    async def get_lead(self, lead_id: int, company_id: int) -> Optional[Lead]:
+    async def create_leads_bulk(
+        self,
+        leads_data: List[LeadCreate],
+        company_id: int,
+        created_by: Optional[int] = None
+    ) -> tuple[List[Lead], List[Dict[str, Any]]]:
+        """
+        Create many leads in one batch.
+        
+        Duplicates are found with a single SELECT, and all new leads are
+        written with a single multi-row INSERT instead of one round trip
+        per lead. Soft-deleted duplicates are reactivated, matching
+        create_lead.
+        
+        Args:
+            leads_data: Validated lead data from API
+            company_id: Company the leads belong to (from auth)
+            created_by: User who created the leads (optional)
+            
+        Returns:
+            Tuple of (created_leads, errors) where each error is
+            {"index": ..., "email": ..., "error": ...}
+        """
+        
+        created: List[Lead] = []
+        errors: List[Dict[str, Any]] = []
+        
+        # One query for every existing lead that collides with the batch
+        emails = [lead_data.email.lower() for lead_data in leads_data]
+        result = await self.db.execute(
+            select(Lead).where(
+                and_(
+                    Lead.company_id == company_id,
+                    Lead.email.in_(emails)
+                )
+            )
+        )
+        existing = {lead.email: lead for lead in result.scalars()}
+        
+        new_rows: List[Dict[str, Any]] = []
+        new_indexes: Dict[str, int] = {}
+        reactivated = 0
+        seen_emails = set()
+        for i, lead_data in enumerate(leads_data):
+            # Emails are stored lowercased, so "A@x.com" and "a@x.com" in
+            # one batch are the same lead: keep the first, report the rest
+            # (they'd otherwise collapse into one row without a trace)
+            if emails[i] in seen_emails:
+                errors.append({
+                    "index": i,
+                    "email": lead_data.email,
+                    "error": f"Lead with email {lead_data.email} appears more than once in this batch"
+                })
+                continue
+            seen_emails.add(emails[i])
+            
+            existing_lead = existing.get(emails[i])
+            
+            if existing_lead is None:
+                row = self._new_lead_row(lead_data, company_id, created_by)
+                new_rows.append(row)
+                new_indexes[row["email"]] = i
+            elif existing_lead.is_deleted:
+                # Staged only; written by the flush below
+                created.append(await self._reactivate_lead(existing_lead, lead_data, flush=False))
+                reactivated += 1
+            else:
+                errors.append({
+                    "index": i,
+                    "email": lead_data.email,
+                    "error": f"Lead with email {lead_data.email} already exists"
+                })
+        
+        if reactivated:
+            await self.db.flush()  # Reactivation UPDATEs
+        
+        new_leads: List[Lead] = []
+        if new_rows:
+            # One multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING *.
+            # RETURNING hands back the full rows (ids and defaults), and
+            # the unique (company_id, email) index quietly skips leads that
+            # another request inserted since our duplicate SELECT.
+            result = await self.db.scalars(
+                self._insert_leads_ignoring_duplicates().returning(Lead),
+                new_rows
+            )
+            new_leads = sorted(result.all(), key=lambda lead: new_indexes[lead.email])
+            
+            inserted = {lead.email for lead in new_leads}
+            for row in new_rows:
+                if row["email"] not in inserted:
+                    errors.append({
+                        "index": new_indexes[row["email"]],
+                        "email": row["email"],
+                        "error": f"Lead with email {row['email']} already exists"
+                    })
+            created.extend(new_leads)
+        
+        if new_rows or reactivated:
+            await self.db.commit()
+        
+        logger.info(f"Bulk created {len(new_leads)} leads for company {company_id}")
+        return created, errors
+    
+    async def get_lead(
+        self,
+        lead_id: int,
+        company_id: int,
+        load_options: Sequence[ORMOption] = ()
+    ) -> Optional[Lead]:
         """
         Get a lead by ID, ensuring it belongs to the company.
         
         This is important for multi-tenant security - users can only
         access leads from their own company.
+        
+        Relationships other than research raise if accessed unless
+        requested through load_options (see the module docstring).
         """
         
         query = select(Lead).where(
@@ -114,11 +304,32 @@ class LeadService:
                 Lead.company_id == company_id,
                 Lead.is_deleted == False
             )
-        )
+        ).options(*_lead_load_options(load_options))
         
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_lead_response(self, lead_id: int, company_id: int) -> Optional[LeadResponse]:
+        """
+        Get a lead as an API response, served from a short-lived cache.
+        
+        Use this for read-only endpoints; callers that modify the lead
+        need the ORM instance from get_lead instead.
+        """
+        
+        key = (company_id, lead_id)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        lead = await self.get_lead(lead_id, company_id)
+        if not lead:
+            return None
+        
+        response = LeadResponse.model_validate(lead)
+        self._response_cache.set(key, response)
+        return response
+    
     async def update_lead(
         self, 
         lead_id: int, 
@@ -134,24 +345,36 @@ class LeadService:
         
         # Check for email conflicts if email is being changed
         if lead_data.email and lead_data.email != lead.email:
-            duplicate = await self._find_duplicate_lead(
+            duplicate_id = await self._find_duplicate_lead_id(
                 email=lead_data.email,
                 company_id=company_id
             )
-            if duplicate and duplicate.id != lead_id:
+            if duplicate_id is not None and duplicate_id != lead_id:
                 raise ValueError(f"Lead with email {lead_data.email} already exists")
         
         # Update fields (only non-None values)
         update_data = lead_data.model_dump(exclude_unset=True)
+        
+        # Score-relevant fields whose value actually changes (clients often
+        # send the whole lead back, unchanged fields included); checked
+        # before the assignments below overwrite the old values
+        rescore = any(
+            field in update_data and update_data[field] != getattr(lead, field)
+            for field in ('company_name', 'job_title', 'source')
+        )
+        
         for field, value in update_data.items():
             setattr(lead, field, value)
         
         # Recalculate score if relevant fields changed
-        if any(field in update_data for field in ['company_name', 'job_title', 'source']):
-            lead = await self._calculate_lead_score(lead)
+        if rescore:
+            lead = self._calculate_lead_score(lead)
         
+        # No refresh: updated_at's onupdate runs client-side, so the
+        # flushed instance already holds every value it wrote
         await self.db.flush()
-        await self.db.refresh(lead)
+        await self.db.commit()
+        self._response_cache.pop((company_id, lead_id))
         
         logger.info(f"Updated lead {lead_id}")
         return lead
@@ -168,7 +391,8 @@ class LeadService:
             return False
         
         lead.is_deleted = True
-        await self.db.flush()
+        await self.db.commit()
+        self._response_cache.pop((company_id, lead_id))
         
         logger.info(f"Soft deleted lead {lead_id}")
         return True
@@ -178,13 +402,24 @@ class LeadService:
         company_id: int,
         filters: Optional[LeadFilter] = None,
         page: int = 1,
-        page_size: int = 50
-    ) -> tuple[List[Lead], int]:
+        page_size: int = 50,
+        with_total: bool = True,
+        after_id: Optional[int] = None,
+        load_options: Sequence[ORMOption] = ()
+    ) -> tuple[List[Lead], Optional[int], Optional[int]]:
         """
         Get a paginated list of leads with filtering.
         
+        Pagination is OFFSET-based by page, or keyset-based (ordered by id)
+        when after_id is given, which avoids scanning skipped rows.
+        
         Returns:
-            Tuple of (leads, total_count)
+            Tuple of (leads, total_count, next_cursor). total_count is None
+            when with_total is False; next_cursor is set in keyset mode
+            when more leads follow.
+        
+        Relationships other than research raise if accessed unless
+        requested through load_options (see the module docstring).
         """
         
         # Base query
@@ -199,20 +434,59 @@ class LeadService:
         if filters:
             query = self._apply_filters(query, filters)
         
-        # Count total (before pagination)
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar()
+        total = None
         
-        # Apply pagination and ordering
-        query = query.order_by(Lead.updated_at.desc())
-        query = query.offset((page - 1) * page_size).limit(page_size)
-        
-        # Execute query
-        result = await self.db.execute(query)
-        leads = result.scalars().all()
+        # Set after the filters, so the COUNT queries built from `query`
+        # below (which select no Lead entity) don't carry them
+        options = _lead_load_options(load_options)
         
-        return list(leads), total
+        # Apply pagination and ordering
+        if after_id is not None:
+            if with_total:
+                # Count before the cursor condition narrows the rows; same
+                # FROM and WHERE, counting instead of selecting every column
+                count_query = query.with_only_columns(func.count(), maintain_column_froms=True)
+                total = (await self.db.execute(count_query)).scalar()
+            
+            # Fetch one extra row to learn whether another page exists
+            query = query.where(Lead.id > after_id).order_by(Lead.id).limit(page_size + 1)
+            query = query.options(*options)
+            result = await self.db.execute(query)
+            leads = list(result.scalars().all())
+        else:
+            query = query.order_by(Lead.updated_at.desc())
+            query = query.offset((page - 1) * page_size).limit(page_size)
+            
+            if with_total:
+                # The total rides along on every row as a window count over
+                # the filtered rows (computed before OFFSET/LIMIT), so the
+                # page and its count come back in one round trip
+                result = await self.db.execute(
+                    query.options(*options).add_columns(func.count().over().label("total"))
+                )
+                rows = result.all()
+                leads = [row[0] for row in rows]
+                if rows:
+                    total = rows[0].total
+                elif page == 1:
+                    total = 0
+                else:
+                    # Past the last page there's no row to carry the total
+                    count_query = (
+                        query.limit(None).offset(None).order_by(None)
+                        .with_only_columns(func.count(), maintain_column_froms=True)
+                    )
+                    total = (await self.db.execute(count_query)).scalar()
+            else:
+                result = await self.db.execute(query.options(*options))
+                leads = list(result.scalars().all())
+        
+        next_cursor = None
+        if after_id is not None and len(leads) > page_size:
+            leads = leads[:page_size]
+            next_cursor = leads[-1].id
+        
+        return leads, total, next_cursor
     
     async def get_lead_stats(self, company_id: int) -> Dict[str, int]:
         """
@@ -222,20 +496,7 @@ class LeadService:
             Dictionary with counts by status: {'total': 100, 'qualified': 25, 'new': 50, 'contacted': 25}
         """
         try:
-            # Base query for non-deleted leads
-            base_query = select(Lead).where(
-                and_(
-                    Lead.company_id == company_id,
-                    Lead.is_deleted == False
-                )
-            )
-            
-            # Get total count
-            total_query = select(func.count()).select_from(base_query.subquery())
-            total_result = await self.db.execute(total_query)
-            total = total_result.scalar()
-            
-            # Get counts by status
+            # Get counts by status (non-deleted leads)
             stats_query = select(
                 Lead.status,
                 func.count(Lead.id).label('count')
@@ -249,6 +510,10 @@ class LeadService:
             stats_result = await self.db.execute(stats_query)
             status_counts = dict(stats_result.all())
             
+            # Every lead has exactly one status, so the total is their sum
+            # (no separate COUNT query)
+            total = sum(status_counts.values())
+            
             # Build stats dictionary
             stats = {
                 'total': total,
@@ -269,7 +534,7 @@ class LeadService:
             }
     
     async def _find_duplicate_lead(self, email: str, company_id: int) -> Optional[Lead]:
-        """Find existing lead with same email in company."""
+        """Find existing lead with same email in company (stored emails are lowercase)."""
         
         query = select(Lead).where(
             and_(
@@ -281,8 +546,69 @@ class LeadService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
-    async def _reactivate_lead(self, lead: Lead, lead_data: LeadCreate) -> Lead:
-        """Reactivate a soft-deleted lead with new data."""
+    async def _find_duplicate_lead_id(self, email: str, company_id: int) -> Optional[int]:
+        """Like _find_duplicate_lead, but only fetches the id (no full row or Lead object)."""
+        
+        query = select(Lead.id).where(
+            and_(
+                Lead.email == email.lower(),
+                Lead.company_id == company_id
+            )
+        )
+        
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+    
+    def _new_lead_row(
+        self,
+        lead_data: LeadCreate,
+        company_id: int,
+        created_by: Optional[int]
+    ) -> Dict[str, Any]:
+        """
+        Column values for inserting a new lead, scored and with its initial status.
+        
+        The INSERTs using these rows don't go through the ORM, so the email
+        is lowercased here, as Lead.normalize_email would.
+        """
+        
+        row = {
+            **lead_data.model_dump(),
+            "email": lead_data.email.lower(),
+            "company_id": company_id,
+            "created_by": created_by
+        }
+        
+        # Apply initial lead scoring
+        scored = self._calculate_lead_score(Lead(**row))
+        row["score"] = scored.score
+        
+        # Set initial status based on score
+        row["status"] = "qualified" if scored.score >= 50 else "new"
+        return row
+    
+    def _insert_leads_ignoring_duplicates(self):
+        """
+        INSERT into leads that skips rows hitting the (company_id, email)
+        unique index instead of failing the whole batch.
+        
+        ON CONFLICT is dialect-specific SQL, so pick the matching insert().
+        """
+        
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return pg_insert(Lead).on_conflict_do_nothing(index_elements=["company_id", "email"])
+        if dialect == "sqlite":
+            return sqlite_insert(Lead).on_conflict_do_nothing(index_elements=["company_id", "email"])
+        return insert(Lead)
+    
+    async def _reactivate_lead(self, lead: Lead, lead_data: LeadCreate, flush: bool = True) -> Lead:
+        """
+        Reactivate a soft-deleted lead with new data.
+        
+        Pass flush=False to only stage the changes, so a caller handling
+        many leads can write them all with one flush.
+        """
         
         # Update with new data
         for field, value in lead_data.model_dump().items():
@@ -290,18 +616,19 @@ class LeadService:
         
         # Reactivate
         lead.is_deleted = False
-        lead.updated_at = datetime.utcnow()
+        lead.updated_at = utcnow()
         
         # Recalculate score
-        lead = await self._calculate_lead_score(lead)
+        lead = self._calculate_lead_score(lead)
         
-        await self.db.flush()
-        await self.db.refresh(lead)
+        if flush:
+            await self.db.flush()
         
         logger.info(f"Reactivated lead {lead.id}")
         return lead
     
-    async def _calculate_lead_score(self, lead: Lead) -> Lead:
+    @staticmethod
+    def _calculate_lead_score(lead: Lead) -> Lead:
         """
         Calculate lead score based on available data.
         
@@ -315,40 +642,14 @@ class LeadService:
         - Quality source: +10 points
         """
         
-        score = 0
-        
-        # Company name available
-        if lead.company_name:
-            score += 20
-        
-        # Job title available
-        if lead.job_title:
-            score += 15
-            
-            # Senior position bonus
-            senior_keywords = ['director', 'manager', 'head', 'vp', 'ceo', 'cto', 'cfo']
-            if any(keyword in lead.job_title.lower() for keyword in senior_keywords):
-                score += 20
-        
-        # Phone number available
-        if lead.phone:
-            score += 10
-        
-        # Email domain quality (basic heuristic)
-        if lead.email:
-            domain = lead.email.split('@')[1].lower()
-            # Avoid free email providers
-            free_domains = ['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com']
-            if domain not in free_domains:
-                score += 10
-        
-        # Source quality
-        high_quality_sources = ['linkedin', 'referral', 'event']
-        if lead.source in high_quality_sources:
-            score += 10
-        
-        # Cap at 100
-        lead.score = min(score, 100)
+        email_domain = lead.email.rpartition('@')[2].lower() if lead.email else None
+        lead.score = _lead_score(
+            bool(lead.company_name),
+            lead.job_title,
+            bool(lead.phone),
+            email_domain,
+            lead.source
+        )
         
         return lead
     
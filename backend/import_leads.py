@@ -14,20 +14,45 @@ import asyncio
 import csv
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Set
 import sys
 import os
 
 # Add the backend directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
 from app.core.database import AsyncSessionLocal, init_db
 from app.models.lead import Lead
 from app.models.company import Company
 from app.services.lead_service import LeadService
 from app.schemas.lead import LeadCreate
 
+# Leads written per INSERT (see CSVLeadImporter._import_batch)
+_IMPORT_BATCH_SIZE = 1000
+
+# Batches written at the same time, each on its own pooled connection
+# (kept well under the pool size, so the API isn't starved during an import)
+_IMPORT_CONCURRENCY = 4
+
+# CSV column handling for _map_csv_row_to_lead_data, built once rather
+# than per row
+_TEXT_COLUMNS = (
+    'email', 'first_name', 'last_name', 'company_name', 'job_title',
+    'phone', 'linkedin_url', 'notes'
+)
+_KNOWN_SOURCES = frozenset({'apollo', 'linkedin', 'website', 'referral', 'cold_email', 'event'})
+_CUSTOM_FIELD_COLUMNS = (
+    'industry', 'company_size', 'tech_stack', 'funding_stage',
+    'employee_count', 'annual_revenue'
+)
+
+# Validates one CSV row's dict straight into a LeadCreate, without
+# LeadCreate(**row) spreading it into keyword arguments first
+_LEAD_ADAPTER = TypeAdapter(LeadCreate)
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -46,6 +71,8 @@ class CSVLeadImporter:
             'skipped': 0,
             'errors': 0
         }
+        # Default company's id, looked up once per importer
+        self._company_id: Optional[int] = None
     
     def _map_csv_row_to_lead_data(self, row: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -56,38 +83,25 @@ class CSVLeadImporter:
         """
         
         # Direct mappings
-        lead_data = {
-            'email': row.get('email', '').strip().lower(),
-            'first_name': row.get('first_name', '').strip(),
-            'last_name': row.get('last_name', '').strip(),
-            'company_name': row.get('company_name', '').strip(),
-            'job_title': row.get('job_title', '').strip(),
-            'phone': row.get('phone', '').strip(),
-            'linkedin_url': row.get('linkedin_url', '').strip(),
-            'notes': row.get('notes', '').strip(),
-        }
+        lead_data = {column: row.get(column, '').strip() for column in _TEXT_COLUMNS}
+        lead_data['email'] = lead_data['email'].lower()
         
         # Handle source field - map to valid enum values
         source = row.get('source', '').strip().lower()
-        if source in ['apollo', 'linkedin', 'website', 'referral', 'cold_email', 'event']:
+        if source in _KNOWN_SOURCES:
             lead_data['source'] = source
         elif source:
             lead_data['source'] = 'other'
         else:
             lead_data['source'] = None
         
-        # Store additional CSV data in custom_fields
-        custom_fields = {}
-        
-        # Map additional fields that aren't in the base Lead model
-        additional_fields = [
-            'industry', 'company_size', 'tech_stack', 'funding_stage', 
-            'employee_count', 'annual_revenue'
-        ]
-        
-        for field in additional_fields:
-            if field in row and row[field]:
-                custom_fields[field] = row[field].strip()
+        # Store additional CSV data (fields that aren't in the base Lead
+        # model) in custom_fields
+        custom_fields = {
+            field: row[field].strip()
+            for field in _CUSTOM_FIELD_COLUMNS
+            if row.get(field)
+        }
         
         if custom_fields:
             lead_data['custom_fields'] = custom_fields
@@ -109,29 +123,116 @@ class CSVLeadImporter:
         
         return True
     
-    async def _get_or_create_default_company(self, db: AsyncSession) -> Company:
-        """Get or create a default company for the leads."""
+    async def _get_or_create_default_company(self, db: AsyncSession) -> int:
+        """
+        Get or create a default company for the leads, returning its id.
+        
+        The id is kept on the importer, so importing again with the same
+        importer doesn't look the company up again.
+        """
+        
+        if self._company_id is not None:
+            return self._company_id
         
         from sqlalchemy import select
         
-        # Try to find existing company
+        # Try to find existing company (only its id is needed)
         result = await db.execute(
-            select(Company).where(Company.name == "Default Company")
+            select(Company.id).where(Company.name == "Default Company").limit(1)
         )
-        company = result.scalar_one_or_none()
+        company_id = result.scalar_one_or_none()
+        
+        if company_id is not None:
+            logger.info(f"Using existing company: Default Company (ID: {company_id})")
+        else:
+            # Create new company
+            new_company = Company(name="Default Company")
+            db.add(new_company)
+            await db.flush()  # Assigns the id
+            company_id = new_company.id
+            logger.info(f"Created new company: {new_company.name} (ID: {company_id})")
+        
+        self._company_id = company_id
+        return company_id
+    
+    def _iter_lead_batches(
+        self,
+        reader: csv.DictReader,
+        stats: Dict[str, int]
+    ) -> Iterator[List[LeadCreate]]:
+        """
+        Turn CSV rows into lists of up to _IMPORT_BATCH_SIZE validated leads.
         
-        if company:
-            logger.info(f"Using existing company: {company.name} (ID: {company.id})")
-            return company
+        Rows are read lazily, one batch at a time. Rows that can't be
+        mapped or fail validation are counted in `stats` and left out.
+        import_leads runs this in a worker thread, so it counts into its
+        own dict rather than self.stats, which the event loop updates.
+        """
+        
+        batch: List[LeadCreate] = []
+        # Only this batch's emails: a repeat in a later batch is caught by
+        # create_leads_bulk's duplicate check against what's already stored
+        seen_emails: Set[str] = set()
         
-        # Create new company
-        new_company = Company(name="Default Company")
-        db.add(new_company)
-        await db.flush()
-        await db.refresh(new_company)
+        for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
+            stats['total_rows'] += 1
+            
+            try:
+                # Map CSV data to lead fields
+                lead_data = self._map_csv_row_to_lead_data(row)
+                
+                # Validate data
+                if not self._validate_lead_data(lead_data):
+                    stats['skipped'] += 1
+                    continue
+                
+                # The same email twice in the batch: keep the first
+                if lead_data['email'] in seen_emails:
+                    stats['skipped'] += 1
+                    logger.info(f"Skipped duplicate: {lead_data['email']}")
+                    continue
+                
+                # Create LeadCreate schema
+                batch.append(_LEAD_ADAPTER.validate_python(lead_data))
+                seen_emails.add(lead_data['email'])
+                
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error importing row {row_num}: {e}")
+                continue
+            
+            if len(batch) >= _IMPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+                seen_emails = set()
         
-        logger.info(f"Created new company: {new_company.name} (ID: {new_company.id})")
-        return new_company
+        # Whatever is left
+        if batch:
+            yield batch
+    
+    async def _import_batch(self, lead_service: LeadService, batch: List[LeadCreate], company_id: int) -> None:
+        """Write one batch of leads; existing leads are skipped (soft-deleted ones are reactivated)."""
+        
+        if not batch:
+            return
+        
+        try:
+            created, duplicates = await lead_service.create_leads_bulk(
+                leads_data=batch,
+                company_id=company_id,
+                created_by=None  # System import
+            )
+        except Exception as e:
+            self.stats['errors'] += len(batch)
+            logger.error(f"Error importing a batch of {len(batch)} leads: {e}")
+            await lead_service.db.rollback()
+            return
+        
+        self.stats['imported'] += len(created)
+        self.stats['skipped'] += len(duplicates)
+        for duplicate in duplicates:
+            logger.info(f"Skipped duplicate: {duplicate['email']}")
+        logger.info(f"Imported {len(created)} leads")
     
     async def import_leads(self) -> Dict[str, int]:
         """Import leads from CSV file."""
@@ -143,55 +244,53 @@ class CSVLeadImporter:
         
         async with AsyncSessionLocal() as db:
             # Get or create default company
-            company = await self._get_or_create_default_company(db)
-            
-            # Initialize lead service
-            lead_service = LeadService(db)
+            company_id = await self._get_or_create_default_company(db)
+            await db.commit()  # Keep the company even if a batch fails
+        
+        # Leads are written _IMPORT_BATCH_SIZE at a time through
+        # create_leads_bulk (one duplicate SELECT + one multi-row INSERT
+        # per batch) instead of a SELECT, INSERT and refresh per row.
+        # The file is streamed, so memory stays at a few batches however
+        # large the CSV is.
+        #
+        # Reading and validating rows is CPU work, so it runs in a worker
+        # thread one batch ahead, while up to _IMPORT_CONCURRENCY earlier
+        # batches are being written, each on its own session (a session
+        # can't run two statements at once). SQLite allows one writer at a
+        # time, so there batches are written one after another.
+        concurrency = 1 if get_settings().database_url.startswith("sqlite") else _IMPORT_CONCURRENCY
+        slots = asyncio.Semaphore(concurrency)
+        writers: Set[asyncio.Task] = set()
+        
+        async def write(batch: List[LeadCreate]) -> None:
+            try:
+                async with AsyncSessionLocal() as session:
+                    await self._import_batch(LeadService(session), batch, company_id)
+            finally:
+                slots.release()
+        
+        parse_stats = {'total_rows': 0, 'skipped': 0, 'errors': 0}
+        with open(self.csv_path, 'r', encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile)
+            batches = self._iter_lead_batches(reader, parse_stats)
             
-            # Read CSV file
-            with open(self.csv_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                
-                for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
-                    self.stats['total_rows'] += 1
-                    
-                    try:
-                        # Map CSV data to lead fields
-                        lead_data = self._map_csv_row_to_lead_data(row)
-                        
-                        # Validate data
-                        if not self._validate_lead_data(lead_data):
-                            self.stats['skipped'] += 1
-                            continue
-                        
-                        # Create LeadCreate schema
-                        lead_create = LeadCreate(**lead_data)
-                        
-                        # Import lead using service
-                        lead = await lead_service.create_lead(
-                            lead_data=lead_create,
-                            company_id=company.id,
-                            created_by=None  # System import
-                        )
-                        
-                        self.stats['imported'] += 1
-                        logger.info(f"Imported lead: {lead.email} ({lead.full_name})")
-                        
-                    except ValueError as e:
-                        # Handle duplicate leads gracefully
-                        if "already exists" in str(e):
-                            self.stats['skipped'] += 1
-                            logger.info(f"Skipped duplicate: {lead_data.get('email', 'unknown')}")
-                        else:
-                            self.stats['errors'] += 1
-                            logger.error(f"Error importing row {row_num}: {e}")
-                    
-                    except Exception as e:
-                        self.stats['errors'] += 1
-                        logger.error(f"Unexpected error importing row {row_num}: {e}")
-                
-                # Commit all changes
-                await db.commit()
+            next_batch = asyncio.create_task(asyncio.to_thread(next, batches, None))
+            try:
+                while (batch := await next_batch) is not None:
+                    next_batch = asyncio.create_task(asyncio.to_thread(next, batches, None))
+                    # Wait for a free slot, so at most `concurrency`
+                    # batches are in flight
+                    await slots.acquire()
+                    writer = asyncio.create_task(write(batch))
+                    writers.add(writer)
+                    writer.add_done_callback(writers.discard)
+            finally:
+                # Let the worker finish its batch before the file closes,
+                # and the writers finish theirs before stats are returned
+                await asyncio.gather(next_batch, *writers, return_exceptions=True)
+        
+        for key, count in parse_stats.items():
+            self.stats[key] += count
         
         return self.stats
 
@@ -200,7 +299,7 @@ async def main():
     
     try:
         # Initialize database
-        await init_db()
+        await init_db(create_schema=True)
         logger.info("Database initialized")
         
         # Import leads
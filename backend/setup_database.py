@@ -6,6 +6,12 @@ This script:
 1. Sets up SQLite database for local development
 2. Creates all tables
 3. Imports leads from CSV
+
+Also the way to bring an existing dev database (such as the checked-in
+sales_automation.db) up to date: create_all adds tables introduced since
+it was made (lead_research, campaign_generation_batches) and leaves
+existing ones alone. Changes to existing tables (new indexes, moving
+leads.research_data) are the SQL in the model comments.
 """
 
 import asyncio
@@ -35,7 +41,7 @@ async def setup_database():
     
     try:
         # Initialize database (creates all tables)
-        await init_db()
+        await init_db(create_schema=True)
         logger.info("✅ Database initialized successfully")
         
         # Create a default company if none exists